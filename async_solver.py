@@ -0,0 +1,76 @@
+"""
+asyncio front-end: await solves that run in a pool of worker processes.
+
+Each solve ships its formula to a worker as a flat array of literals and
+runs a fresh CDCLSolver there, so the event loop never blocks on the search
+and many solves can be awaited concurrently. Timeouts are enforced by the
+worker itself through the solver's time budget (counted from submission,
+so time spent queued counts too); a timed-out solve answers UNKNOWN rather
+than raising.
+"""
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import time
+from array import array
+
+from sat_solver import UNKNOWN, CDCLSolver
+
+
+def _solve_job(literals, config, assumptions, budgets, deadline):
+    """Worker process: solve one formula within its budgets."""
+    if deadline is not None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return UNKNOWN, {}
+        budgets["time_budget"] = remaining
+    solver = CDCLSolver(**config)
+    solver.add_clauses_flat(literals)
+    return solver.solve(assumptions, **budgets)
+
+
+class AsyncSolverPool:
+    """A process pool that solves formulas for asyncio code.
+
+    `config` holds CDCLSolver keyword arguments used for every solve.
+    Use it as an async context manager, or call close() when done.
+    """
+
+    def __init__(self, max_workers=None, config=None, grace=1.0, context=None):
+        self.config = dict(config or {})
+        # Extra seconds to wait for a worker past its deadline before
+        # giving up on it from the event loop side
+        self.grace = grace
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers, mp_context=context or multiprocessing.get_context())
+
+    async def solve(self, clauses, assumptions=(), timeout=None, conflict_budget=None,
+                    propagation_budget=None, memory_budget=None):
+        """Solve `clauses` (lists of ints) in a worker process.
+
+        Returns what CDCLSolver.solve returns: (True, model), (False, {})
+        or (UNKNOWN, {}) when a budget or `timeout` (seconds) ran out.
+        Cancelling the awaiting task drops the solve if it has not
+        started yet; a running one still stops at its deadline.
+        """
+        literals = array("i", [lit for clause in clauses for lit in (*clause, 0)])
+        budgets = {"conflict_budget": conflict_budget, "propagation_budget": propagation_budget,
+                   "memory_budget": memory_budget}
+        deadline = None if timeout is None else time.time() + timeout
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, _solve_job, literals, self.config,
+                                      list(assumptions), budgets, deadline)
+        try:
+            return await asyncio.wait_for(future, None if timeout is None else timeout + self.grace)
+        except asyncio.TimeoutError:
+            return UNKNOWN, {}
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
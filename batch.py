@@ -0,0 +1,253 @@
+"""
+Batch solving with a canonical-formula result cache.
+
+Every formula is first put in a canonical form: literals sorted within
+clauses, duplicates dropped, clauses sorted, and optionally variables
+renumbered 1..n in an order that does not depend on the caller's
+numbering. The SHA-256 of that form keys an on-disk LRU cache (SQLite)
+holding the answer and a bit-packed model in canonical numbering. Only
+misses go to the worker processes; models come back remapped to the
+caller's variables.
+"""
+
+import concurrent.futures
+import hashlib
+import multiprocessing
+import sqlite3
+from array import array
+
+from sat_solver import UNKNOWN, CDCLSolver
+
+# Bytes charged per cache entry on top of its key and model
+ENTRY_OVERHEAD = 64
+
+
+def _refined_order(clauses, num_vars, rounds):
+    """Variables ordered by a renaming-invariant colour, then by number.
+
+    Colours start from the positive and negative occurrence counts and are
+    refined `rounds` times by the colours of the clauses a variable occurs
+    in (1-dimensional Weisfeiler-Leman). Colours are ranks of sorted
+    signatures, so they are the same on every machine.
+    """
+    occurrences = [[] for _ in range(num_vars + 1)]
+    for i, clause in enumerate(clauses):
+        for lit in clause:
+            occurrences[abs(lit)].append((i, lit > 0))
+    signatures = [(sum(positive for _, positive in occ), len(occ)) for occ in occurrences]
+    for _ in range(rounds):
+        colors = _ranks(signatures)
+        clause_colors = _ranks([tuple(sorted((colors[abs(lit)], lit > 0) for lit in clause))
+                                for clause in clauses])
+        signatures = [(colors[var], tuple(sorted((clause_colors[i], positive) for i, positive in occ)))
+                      for var, occ in enumerate(occurrences)]
+    colors = _ranks(signatures)
+    return sorted((var for var in range(1, num_vars + 1) if occurrences[var]),
+                  key=lambda var: (colors[var], var))
+
+
+def _ranks(signatures):
+    rank = {signature: i for i, signature in enumerate(sorted(set(signatures)))}
+    return [rank[signature] for signature in signatures]
+
+
+def canonicalize(clauses, renumber=False, rounds=3):
+    """Return (canonical clauses, mapping) for a list of clauses.
+
+    mapping[v] is the caller's variable for canonical variable v (identity
+    unless `renumber`). Equal canonical forms mean the same formula up to
+    renaming; with `renumber`, formulas that differ only by a renaming
+    usually, though not always (symmetric variables), meet.
+    """
+    clauses = [sorted(set(clause), key=lambda lit: (abs(lit), lit < 0)) for clause in clauses]
+    num_vars = max((abs(lit) for clause in clauses for lit in clause), default=0)
+    if renumber:
+        order = _refined_order(clauses, num_vars, rounds)
+        mapping = [0] + order
+        new = [0] * (num_vars + 1)
+        for canonical, var in enumerate(order, 1):
+            new[var] = canonical
+        clauses = [sorted((new[lit] if lit > 0 else -new[-lit] for lit in clause),
+                          key=lambda lit: (abs(lit), lit < 0)) for clause in clauses]
+    else:
+        mapping = list(range(num_vars + 1))
+    canonical = sorted(set(map(tuple, clauses)))
+    return canonical, mapping
+
+
+def formula_key(canonical):
+    """SHA-256 of a canonical formula, as bytes."""
+    flat = array("i", [lit for clause in canonical for lit in (*clause, 0)])
+    return hashlib.sha256(flat.tobytes()).digest()
+
+
+def pack_model(model, num_vars):
+    """Bit v - 1 of the result is the value of variable v."""
+    bits = 0
+    for var, value in model.items():
+        if value and var <= num_vars:
+            bits |= 1 << (var - 1)
+    return bits.to_bytes((num_vars + 7) // 8, "little")
+
+
+def unpack_model(packed, mapping, num_vars):
+    """Model over variables 1..num_vars from a packed canonical model.
+
+    Variables the formula does not mention (absent from mapping) are False.
+    """
+    bits = int.from_bytes(packed, "little")
+    model = dict.fromkeys(range(1, num_vars + 1), False)
+    for canonical in range(1, len(mapping)):
+        model[mapping[canonical]] = bool(bits >> (canonical - 1) & 1)
+    return model
+
+
+class ResultCache:
+    """On-disk LRU cache: formula key -> (is_sat, packed model).
+
+    Entries carry a use counter; once the stored bytes exceed `max_bytes`
+    the least recently used entries are evicted. Lookups only touch an
+    in-memory list of used keys, written back by flush().
+    """
+
+    def __init__(self, path, max_bytes=256 << 20):
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, sat INTEGER,"
+                        " model BLOB, size INTEGER, used INTEGER)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        self.total, self.clock = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(used), 0) FROM results").fetchone()
+        self.touched = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return (is_sat, packed model) or None."""
+        row = self.db.execute("SELECT sat, model FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        self.touched[key] = self.clock
+        return bool(row[0]), row[1]
+
+    def put(self, key, is_sat, packed):
+        size = len(key) + len(packed) + ENTRY_OVERHEAD
+        self.clock += 1
+        old = self.db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        if old is not None:
+            self.total -= old[0]
+        self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                        (key, int(is_sat), packed, size, self.clock))
+        self.total += size
+        if self.total > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        self._write_touched()
+        while self.total > self.max_bytes:
+            rows = self.db.execute("SELECT key, size FROM results ORDER BY used LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self.db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.total -= size
+                if self.total <= self.max_bytes:
+                    break
+
+    def _write_touched(self):
+        if self.touched:
+            self.db.executemany("UPDATE results SET used = ? WHERE key = ?",
+                                [(used, key) for key, used in self.touched.items()])
+            self.touched.clear()
+
+    def flush(self):
+        self._write_touched()
+        self.db.commit()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def _solve_canonical(literals, num_vars, config, budgets):
+    """Worker process: solve one canonical formula."""
+    solver = CDCLSolver(**config)
+    solver.add_clauses_flat(literals)
+    is_sat, model = solver.solve(**budgets)
+    return is_sat, pack_model(model, num_vars) if is_sat else b""
+
+
+class BatchSolver:
+    """Solve many formulas, answering repeats from the cache.
+
+    `cache` is a ResultCache, a path for one, or None for no cache;
+    `config` holds CDCLSolver keyword arguments. Budgets given to solve()
+    apply to every formula; UNKNOWN answers are not cached.
+    """
+
+    def __init__(self, cache=None, renumber=False, num_workers=None, config=None, context=None):
+        if isinstance(cache, str):
+            cache = ResultCache(cache)
+        self.cache = cache
+        self.renumber = renumber
+        self.config = dict(config or {})
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            num_workers, mp_context=context or multiprocessing.get_context())
+
+    def solve(self, formulas, **budgets):
+        """Return one (is_sat, model) per formula, in order.
+
+        Each formula is a list of clauses; models cover variables 1..n of
+        that formula in the caller's numbering.
+        """
+        cache = self.cache
+        entries = []
+        found = {}
+        pending = {}
+        for clauses in formulas:
+            canonical, mapping = canonicalize(clauses, self.renumber)
+            key = formula_key(canonical)
+            num_vars = max((abs(lit) for clause in clauses for lit in clause), default=0)
+            entries.append((key, mapping, num_vars))
+            if key in found or key in pending:
+                continue
+            hit = cache.get(key) if cache is not None else None
+            if hit is not None:
+                found[key] = hit
+            else:
+                literals = array("i", [lit for clause in canonical for lit in (*clause, 0)])
+                pending[key] = self.executor.submit(_solve_canonical, literals, len(mapping) - 1,
+                                                    self.config, budgets)
+
+        for key, future in pending.items():
+            is_sat, packed = future.result()
+            found[key] = (is_sat, packed)
+            if cache is not None and is_sat is not UNKNOWN:
+                cache.put(key, is_sat, packed)
+        if cache is not None:
+            cache.flush()
+
+        results = []
+        for key, mapping, num_vars in entries:
+            is_sat, packed = found[key]
+            results.append((is_sat, unpack_model(packed, mapping, num_vars) if is_sat else {}))
+        return results
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
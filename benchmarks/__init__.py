@@ -0,0 +1,5 @@
+"""
+Benchmark instances, runner and regression check for CDCLSolver.
+
+See runner.py for the command line (python -m benchmarks).
+"""
@@ -0,0 +1,97 @@
+"""
+Seeded CNF generators for benchmarking.
+
+Every generator returns a list of clauses (lists of ints) and produces the
+same formula for the same arguments, so results can be compared across
+runs and machines.
+"""
+
+import itertools
+import random
+
+# Clause/variable ratios at the satisfiability threshold of random k-SAT
+THRESHOLDS = {2: 1.0, 3: 4.26, 4: 9.93, 5: 21.12, 6: 43.37, 7: 87.79}
+
+
+def random_ksat(num_vars, k=3, ratio=None, seed=0):
+    """Uniform random k-SAT, by default right at the phase transition."""
+    rng = random.Random(seed)
+    if ratio is None:
+        ratio = THRESHOLDS[k]
+    variables = range(1, num_vars + 1)
+    return [[var if rng.random() < 0.5 else -var for var in rng.sample(variables, k)]
+            for _ in range(round(ratio * num_vars))]
+
+
+def pigeonhole(holes):
+    """holes + 1 pigeons in `holes` holes; always UNSAT."""
+    pigeons = holes + 1
+
+    def var(pigeon, hole):
+        return pigeon * holes + hole + 1
+
+    clauses = [[var(p, h) for h in range(holes)] for p in range(pigeons)]
+    for h in range(holes):
+        for p, q in itertools.combinations(range(pigeons), 2):
+            clauses.append([-var(p, h), -var(q, h)])
+    return clauses
+
+
+def graph_coloring(num_nodes, colors=3, average_degree=4.6, seed=0):
+    """Color a random graph with `num_nodes` nodes.
+
+    With 3 colors, an average degree around 4.6 is the hard region.
+    Variable node * colors + c + 1 says that the node has color c.
+    """
+    rng = random.Random(seed)
+    num_edges = round(average_degree * num_nodes / 2)
+    edges = set()
+    while len(edges) < num_edges:
+        a, b = rng.sample(range(num_nodes), 2)
+        edges.add((min(a, b), max(a, b)))
+
+    def var(node, color):
+        return node * colors + color + 1
+
+    clauses = []
+    for node in range(num_nodes):
+        clauses.append([var(node, c) for c in range(colors)])
+        for c, d in itertools.combinations(range(colors), 2):
+            clauses.append([-var(node, c), -var(node, d)])
+    for a, b in sorted(edges):
+        for c in range(colors):
+            clauses.append([-var(a, c), -var(b, c)])
+    return clauses
+
+
+def parity(num_vars, num_equations=None, width=3, satisfiable=True, seed=0):
+    """Random XOR equations of `width` variables, expanded into clauses.
+
+    With satisfiable=True the right-hand sides come from a hidden random
+    assignment; otherwise they are random and the system is usually UNSAT
+    once there are more equations than variables.
+    """
+    rng = random.Random(seed)
+    if num_equations is None:
+        num_equations = num_vars
+    hidden = [None] + [rng.random() < 0.5 for _ in range(num_vars)]
+    clauses = []
+    for _ in range(num_equations):
+        variables = rng.sample(range(1, num_vars + 1), width)
+        if satisfiable:
+            odd = sum(hidden[var] for var in variables) % 2 == 1
+        else:
+            odd = rng.random() < 0.5
+        # One clause per assignment of the wrong parity, which it forbids
+        for signs in itertools.product((False, True), repeat=width):
+            if (sum(signs) % 2 == 1) != odd:
+                clauses.append([-var if sign else var for var, sign in zip(variables, signs)])
+    return clauses
+
+
+GENERATORS = {
+    "random_ksat": random_ksat,
+    "pigeonhole": pigeonhole,
+    "graph_coloring": graph_coloring,
+    "parity": parity,
+}
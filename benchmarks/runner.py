@@ -0,0 +1,239 @@
+"""
+Benchmark runner and regression check.
+
+    python -m benchmarks run [--suite NAME] [--instances DIR] [-o results.json]
+    python -m benchmarks compare baseline.json results.json
+
+Every instance is solved in a fresh process, so peak RSS is per instance
+and a crash or timeout only loses that one result. Results record wall
+time (load + solve), conflicts and propagations per second, and peak RSS.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.generators import GENERATORS
+
+INSTANCE_DIR = Path(__file__).resolve().parent / "instances"
+
+# (name, generator, arguments); sized so that each takes seconds, not minutes
+SUITES = {
+    "default": [
+        ("ksat3-v150-s2", "random_ksat", {"num_vars": 150, "seed": 2}),
+        ("ksat3-v200-s4", "random_ksat", {"num_vars": 200, "seed": 4}),
+        ("ksat4-v60-s1", "random_ksat", {"num_vars": 60, "k": 4, "seed": 1}),
+        ("ksat5-v25-s1", "random_ksat", {"num_vars": 25, "k": 5, "seed": 1}),
+        ("php-7", "pigeonhole", {"holes": 7}),
+        ("color3-n150-s1", "graph_coloring", {"num_nodes": 150, "average_degree": 4.7, "seed": 1}),
+        ("color4-n60-s2", "graph_coloring", {"num_nodes": 60, "colors": 4, "average_degree": 8.4, "seed": 2}),
+        ("parity4-n100-s1", "parity", {"num_vars": 100, "width": 4, "seed": 1}),
+        ("parity4-n40-unsat", "parity", {"num_vars": 40, "num_equations": 44, "width": 4,
+                                          "satisfiable": False, "seed": 1}),
+    ],
+    "large": [
+        ("ksat3-v200-s3", "random_ksat", {"num_vars": 200, "seed": 3}),
+        ("ksat3-v250-s1", "random_ksat", {"num_vars": 250, "seed": 1}),
+        ("php-8", "pigeonhole", {"holes": 8}),
+        ("color3-n300-s3", "graph_coloring", {"num_nodes": 300, "average_degree": 4.7, "seed": 3}),
+        ("parity4-n140-s1", "parity", {"num_vars": 140, "width": 4, "seed": 1}),
+    ],
+}
+
+
+def _peak_rss_kb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _satisfies(clauses, assignment):
+    return all(any(assignment.get(abs(lit)) == (lit > 0) for lit in clause) for clause in clauses)
+
+
+def _run_instance(spec, config, results):
+    """Child process: load, solve and check one instance."""
+    from dimacs import load_dimacs, read_dimacs
+    from sat_solver import CDCLSolver
+
+    kind, source, arguments = spec
+    start = time.perf_counter()
+    solver = CDCLSolver(**config)
+    if kind == "file":
+        load_dimacs(solver, source)
+    else:
+        clauses = GENERATORS[source](**arguments)
+        solver.add_clauses_flat([lit for clause in clauses for lit in (*clause, 0)])
+    loaded = time.perf_counter()
+    is_sat, assignment = solver.solve()
+    end = time.perf_counter()
+
+    status = "SAT" if is_sat else "UNSAT"
+    if is_sat:
+        if kind == "file":
+            clauses = read_dimacs(source)[1]
+        if not _satisfies(clauses, assignment):
+            status = "WRONG"
+    stats = solver.stats
+    solve_time = end - loaded
+    results.put({
+        "status": status,
+        "wall_time": end - start,
+        "load_time": loaded - start,
+        "solve_time": solve_time,
+        "decisions": stats.decisions,
+        "conflicts": stats.conflicts,
+        "propagations": stats.propagations,
+        "conflicts_per_second": stats.conflicts / solve_time if solve_time else 0.0,
+        "propagations_per_second": stats.propagations / solve_time if solve_time else 0.0,
+        "peak_rss_kb": _peak_rss_kb(),
+    })
+
+
+def run_one(spec, config=None, timeout=300.0):
+    """Solve one instance in a fresh process and return its result record."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run_instance, args=(spec, config or {}, results), daemon=True)
+    start = time.perf_counter()
+    process.start()
+    try:
+        return results.get(timeout=timeout)
+    except queue.Empty:
+        status = "TIMEOUT" if process.is_alive() else "ERROR"
+        return {"status": status, "wall_time": time.perf_counter() - start}
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+def collect_instances(suite=None, directories=()):
+    """Return (name, spec) pairs for a generator suite and CNF folders."""
+    instances = []
+    if suite:
+        for name, generator, arguments in SUITES[suite]:
+            instances.append((name, ("generator", generator, arguments)))
+    for directory in directories:
+        for path in sorted(Path(directory).iterdir()):
+            if ".cnf" in path.suffixes:
+                instances.append((path.name, ("file", str(path), None)))
+    return instances
+
+
+def _metadata(config):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": config,
+    }
+
+
+def run_benchmarks(instances, config=None, timeout=300.0, repeat=1, out=sys.stdout):
+    """Run every instance `repeat` times, keeping the fastest run."""
+    results = {}
+    for name, spec in instances:
+        best = None
+        for _ in range(repeat):
+            record = run_one(spec, config, timeout)
+            if best is None or record["wall_time"] < best["wall_time"]:
+                best = record
+            if record["status"] not in ("SAT", "UNSAT"):
+                break
+        results[name] = best
+        line = f"{name:<28} {best['status']:<8} {best['wall_time']:8.2f}s"
+        if "conflicts" in best:
+            line += (f" {best['conflicts']:>9} conflicts {best['conflicts_per_second']:9.0f}/s"
+                     f" {best['propagations_per_second']:10.0f} props/s {best['peak_rss_kb'] / 1024:7.1f} MB")
+        out.write(line + "\n")
+        out.flush()
+    return {"meta": _metadata(config or {}), "results": results}
+
+
+def compare(baseline, current, threshold=0.10, min_time=0.05, out=sys.stdout):
+    """Print a per-instance comparison and return the list of regressions.
+
+    An instance regresses when it gets more than `threshold` slower (and
+    by more than `min_time` seconds, to ignore noise on tiny instances),
+    stops solving, or changes its answer.
+    """
+    regressions = []
+    old_results = baseline["results"]
+    new_results = current["results"]
+    for name in sorted(old_results.keys() & new_results.keys()):
+        old = old_results[name]
+        new = new_results[name]
+        note = ""
+        if old["status"] in ("SAT", "UNSAT") and new["status"] != old["status"]:
+            note = f"REGRESSION: {old['status']} -> {new['status']}"
+        elif new["status"] in ("SAT", "UNSAT"):
+            ratio = new["wall_time"] / old["wall_time"] if old["wall_time"] else 1.0
+            if ratio > 1 + threshold and new["wall_time"] - old["wall_time"] > min_time:
+                note = "REGRESSION"
+            elif ratio < 1 - threshold and old["wall_time"] - new["wall_time"] > min_time:
+                note = "improved"
+        if note.startswith("REGRESSION"):
+            regressions.append(name)
+        out.write(f"{name:<28} {old['wall_time']:8.2f}s -> {new['wall_time']:8.2f}s"
+                  f" {new['wall_time'] / max(old['wall_time'], 1e-9):6.2f}x  {note}\n")
+    for name in sorted(old_results.keys() - new_results.keys()):
+        out.write(f"{name:<28} missing from the new results\n")
+    out.write(f"{len(regressions)} regression(s)\n")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Run the solver benchmarks or compare two result files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run benchmarks and write a JSON result file")
+    run.add_argument("--suite", choices=sorted(SUITES) + ["none"], default="default")
+    run.add_argument("--instances", action="append", metavar="DIR",
+                     help=f"folder of .cnf files (default: {INSTANCE_DIR.name}/; repeatable)")
+    run.add_argument("--config", default="{}", help="CDCLSolver keyword arguments as JSON")
+    run.add_argument("--timeout", type=float, default=300.0, help="seconds per instance")
+    run.add_argument("--repeat", type=int, default=1, help="runs per instance (fastest is kept)")
+    run.add_argument("-o", "--output", default="benchmark_results.json")
+
+    check = commands.add_parser("compare", help="flag regressions against a baseline")
+    check.add_argument("baseline")
+    check.add_argument("current")
+    check.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    check.add_argument("--min-time", type=float, default=0.05, help="ignore differences below this (s)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        directories = args.instances if args.instances is not None else [INSTANCE_DIR]
+        instances = collect_instances(None if args.suite == "none" else args.suite, directories)
+        report = run_benchmarks(instances, json.loads(args.config), args.timeout, args.repeat)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    return 1 if compare(baseline, current, args.threshold, args.min_time) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
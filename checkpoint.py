@@ -0,0 +1,181 @@
+"""
+Checkpoints: save a solver's state to a binary file and resume from it.
+
+A checkpoint holds the clause arena with the original and learned clause
+references, clause and variable activities, saved phases, the level-0
+trail, statistics, eliminated variables and native constraints. It does
+not hold the solver's options (pass them again to load_checkpoint), the
+restart policy's averages or a DRAT proof in progress.
+
+Layout: an 8-byte magic, the length of a JSON header (little-endian
+uint64), the header, then the arrays it lists, each starting at a multiple
+of 8 bytes. load_checkpoint maps the file and copies each array straight
+out of the mapping, so resuming costs little more than rebuilding the
+watch lists.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from constraints import AtMost, Xor
+from sat_solver import HEADER_SIZE, CDCLSolver
+
+MAGIC = b"CDCLCKP\x01"
+
+# SolverStats counters that a checkpoint carries over
+STAT_COUNTERS = ("decisions", "propagations", "conflicts", "restarts", "rephases", "learned",
+                 "learned_literals", "solve_time")
+
+
+def _padding(offset):
+    return -offset % 8
+
+
+def save_checkpoint(solver, path):
+    """Write the state of `solver` to `path`, replacing it atomically.
+
+    The solver may be in the middle of a search; only its level-0
+    assignments are kept.
+    """
+    if solver.wasted:
+        solver._compact_arena()
+    trail = solver.trail[:solver.trail_lim[0]] if solver.trail_lim else solver.trail
+    learned = solver.learned_clauses
+    clause_activity = solver.clause_activity
+    sections = [
+        ("arena", solver.arena),
+        ("clauses", array("i", solver.clauses)),
+        ("learned_clauses", array("i", learned)),
+        ("clause_activity", array("d", [clause_activity[cref] for cref in learned])),
+        ("variable_activity", array("d", solver.variable_activity)),
+        ("saved_phases", array("b", map(bool, solver.saved_phases))),
+        ("trail", array("i", trail)),
+    ]
+    stats = solver.stats
+    constraints = []
+    for constraint in solver.constraints:
+        if isinstance(constraint, AtMost):
+            constraints.append(["atmost", constraint.lits, constraint.k])
+        elif isinstance(constraint, Xor):
+            constraints.append(["xor", constraint.vars, constraint.parity])
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "num_vars": solver.num_vars,
+        "ok": solver.ok,
+        "simplified": solver.simplified,
+        "var_inc": solver.var_inc,
+        "cla_inc": solver.cla_inc,
+        "next_reduce": solver.next_reduce,
+        "next_rephase": solver.next_rephase,
+        "stats": {name: getattr(stats, name) for name in STAT_COUNTERS},
+        "size_histogram": list(stats.size_histogram.items()),
+        "lbd_histogram": list(stats.lbd_histogram.items()),
+        "eliminated": [[var, [list(clause) for clause in clauses]] for var, clauses in solver.eliminated.items()],
+        "constraints": constraints,
+        "xors_changed": solver.xors_changed,
+        "gauss_derived": sorted(solver.gauss_derived),
+        "info": solver.checkpoint_info,
+        "sections": [[name, values.typecode, len(values)] for name, values in sections],
+    }).encode()
+
+    temporary = f"{os.fspath(path)}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        offset = len(MAGIC) + 8 + len(header)
+        for _, values in sections:
+            f.write(bytes(_padding(offset)))
+            offset += _padding(offset)
+            values.tofile(f)
+            offset += len(values) * values.itemsize
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _read_sections(path):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            if view[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a solver checkpoint")
+            (length,) = struct.unpack_from("<Q", mapped, len(MAGIC))
+            offset = len(MAGIC) + 8
+            header = json.loads(bytes(view[offset:offset + length]))
+            offset += length
+            sections = {}
+            for name, typecode, count in header["sections"]:
+                offset += _padding(offset)
+                values = array(typecode)
+                size = count * values.itemsize
+                if offset + size > len(mapped):
+                    raise ValueError(f"{path} is truncated")
+                values.frombytes(view[offset:offset + size])
+                if header["byteorder"] != sys.byteorder:
+                    values.byteswap()
+                sections[name] = values
+                offset += size
+        finally:
+            view.release()
+    return header, sections
+
+
+def load_checkpoint(path, **options):
+    """A CDCLSolver (created with `options`) in the state saved at `path`."""
+    header, sections = _read_sections(path)
+    solver = CDCLSolver(**options)
+    if header["num_vars"]:
+        solver._grow(header["num_vars"])
+
+    arena = sections["arena"]
+    solver.arena = arena
+    solver.clauses = sections["clauses"].tolist()
+    learned = solver.learned_clauses = sections["learned_clauses"].tolist()
+    solver.clause_activity = dict(zip(learned, sections["clause_activity"]))
+    solver.learned_bytes = 4 * (HEADER_SIZE * len(learned) + sum(arena[cref] for cref in learned))
+    for crefs in (solver.clauses, learned):
+        for cref in crefs:
+            solver._attach_clause(cref)
+
+    # In place: the decision heap holds on to the activity list
+    solver.variable_activity[:] = sections["variable_activity"].tolist()
+    solver.order_heap.rebuild()
+    solver.saved_phases[:] = map(bool, sections["saved_phases"])
+    solver.var_inc = header["var_inc"]
+    solver.cla_inc = header["cla_inc"]
+    solver.next_reduce = header["next_reduce"]
+    solver.next_rephase = header["next_rephase"]
+    stats = solver.stats
+    for name, value in header["stats"].items():
+        setattr(stats, name, value)
+    stats.size_histogram.update(dict(header["size_histogram"]))
+    stats.lbd_histogram.update(dict(header["lbd_histogram"]))
+    solver.eliminated = {var: clauses for var, clauses in header["eliminated"]}
+    solver.simplified = header["simplified"]
+    solver.checkpoint_info = header["info"]
+
+    assignments = solver.assignments
+    for lit in sections["trail"]:
+        if assignments[lit] is None:
+            solver._enqueue(lit)
+    for kind, variables, bound in header["constraints"]:
+        constraint = AtMost(variables, bound) if kind == "atmost" else Xor(variables, bound)
+        cid = len(solver.constraints)
+        solver.constraints.append(constraint)
+        if kind == "xor":
+            solver.has_xors = True
+        if not constraint.attach(solver, cid):
+            solver.ok = False
+    solver.xors_changed = header["xors_changed"]
+    solver.gauss_derived = {tuple(key) for key in header["gauss_derived"]}
+
+    solver.ok = solver.ok and header["ok"]
+    if solver.ok and not solver._unit_propagation()[0]:
+        solver.ok = False
+    solver.gauss_trail = len(solver.trail)
+    return solver
@@ -0,0 +1,191 @@
+"""
+Native cardinality and parity constraints for CDCLSolver.
+
+AtMost(lits, k) and Xor(vars, parity) propagate directly on the solver's
+trail instead of being expanded into clauses. An implied literal records
+the constraint (as the negative marker -(cid + 1) in the solver's
+implications) and its reason clause is only built when conflict analysis
+asks for it, from the current assignment: the literals a constraint
+propagates from stay assigned for as long as the literal it implied does.
+
+gauss_jordan() is the GF(2) elimination the solver runs over its XOR
+constraints at level 0.
+"""
+
+# Results of propagate(): the watch stays, moved to another literal, or
+# the constraint is violated
+KEEP = 0
+MOVED = 1
+CONFLICT = 2
+
+
+class AtMost:
+    """At most `k` of the literals `lits` are true.
+
+    The constraint watches every literal becoming true and counts them;
+    once k are true, the open ones are set false. The reason for -lit is
+    -lit plus the negations of the k true literals.
+
+    The count is the length of `counted`, the trail positions (with their
+    literals) of the true literals seen so far. Backtracking does not
+    visit the constraint: entries the trail no longer holds are dropped
+    the next time a literal is counted, and since the trail is a stack
+    they are always on top.
+    """
+
+    __slots__ = ("lits", "k", "counted")
+
+    def __init__(self, lits, k):
+        self.lits = lits
+        self.k = k
+        self.counted = []
+
+    def attach(self, solver, cid):
+        """Watch the constraint and apply it to the current assignment."""
+        for lit in self.lits:
+            solver.native_watches[lit].append(cid)
+        # Literals already propagated will not be seen again
+        members = set(self.lits)
+        trail = solver.trail
+        self.counted = [(pos, trail[pos]) for pos in range(solver.qhead) if trail[pos] in members]
+        true = sum(solver.assignments[lit] is True for lit in self.lits)
+        if true > self.k:
+            return False
+        if true == self.k:
+            self._imply(solver, cid)
+        return True
+
+    def propagate(self, solver, lit, cid):
+        trail = solver.trail
+        pos = solver.qhead - 1
+        counted = self.counted
+        while counted:
+            top, top_lit = counted[-1]
+            if top < pos and trail[top] == top_lit:
+                break
+            counted.pop()
+        counted.append((pos, lit))
+        true = len(counted)
+        if true < self.k:
+            return KEEP
+        if true > self.k:
+            return CONFLICT
+        self._imply(solver, cid)
+        return KEEP
+
+    def _imply(self, solver, cid):
+        assignments = solver.assignments
+        marker = -cid - 1
+        for other in self.lits:
+            if assignments[other] is None:
+                solver._enqueue(-other, marker)
+
+    def reason(self, assignments, lit):
+        """Reason clause for `lit`, or the conflict clause for lit 0."""
+        clause = [-other for other in self.lits if assignments[other] is True]
+        if lit:
+            clause.insert(0, lit)
+        return clause
+
+    def satisfied(self, assignments):
+        return sum(assignments[lit] is True for lit in self.lits) <= self.k
+
+    def variables(self):
+        return [abs(lit) for lit in self.lits]
+
+
+class Xor:
+    """The variables `vars` (at least two) sum to `parity` modulo 2.
+
+    Like a clause, the constraint watches two open variables (the first
+    two of `vars`, in either polarity) and moves a watch when its variable
+    gets a value. With one open variable left, that one is implied.
+    """
+
+    __slots__ = ("vars", "parity")
+
+    def __init__(self, vars, parity):
+        self.vars = vars
+        self.parity = parity
+
+    def attach(self, solver, cid):
+        assignments = solver.assignments
+        variables = self.vars
+        variables.sort(key=lambda var: assignments[var] is not None)
+        watches = solver.native_watches
+        for var in variables[:2]:
+            watches[var].append(cid)
+            watches[-var].append(cid)
+        if assignments[variables[1]] is None:
+            return True
+        return self._implied(solver, cid) != CONFLICT
+
+    def propagate(self, solver, lit, cid):
+        assignments = solver.assignments
+        variables = self.vars
+        var = abs(lit)
+        if variables[0] == var:
+            variables[0], variables[1] = variables[1], var
+        for k in range(2, len(variables)):
+            other = variables[k]
+            if assignments[other] is None:
+                variables[1] = other
+                variables[k] = var
+                watches = solver.native_watches
+                watches[-lit].remove(cid)
+                watches[other].append(cid)
+                watches[-other].append(cid)
+                return MOVED
+        return self._implied(solver, cid)
+
+    def _implied(self, solver, cid):
+        # Every variable but possibly the first is assigned
+        assignments = solver.assignments
+        variables = self.vars
+        parity = self.parity
+        for var in variables[1:]:
+            if assignments[var]:
+                parity ^= 1
+        first = variables[0]
+        value = assignments[first]
+        if value is None:
+            solver._enqueue(first if parity else -first, -cid - 1)
+            return KEEP
+        return CONFLICT if value != bool(parity) else KEEP
+
+    def reason(self, assignments, lit):
+        var = abs(lit)
+        clause = [-other if assignments[other] else other for other in self.vars if other != var]
+        if lit:
+            clause.insert(0, lit)
+        return clause
+
+    def satisfied(self, assignments):
+        return sum(bool(assignments[var]) for var in self.vars) % 2 == self.parity
+
+    def variables(self):
+        return self.vars
+
+
+def gauss_jordan(rows):
+    """Reduced row echelon form of XOR rows over GF(2).
+
+    Rows are (mask, parity) pairs, bit i of mask standing for column i.
+    Returns the nonzero reduced rows, or None if the rows are inconsistent.
+    """
+    pivots = []
+    for mask, parity in rows:
+        for bit, pivot_mask, pivot_parity in pivots:
+            if mask & bit:
+                mask ^= pivot_mask
+                parity ^= pivot_parity
+        if not mask:
+            if parity:
+                return None
+            continue
+        bit = mask & -mask
+        for i, (other_bit, other_mask, other_parity) in enumerate(pivots):
+            if other_mask & bit:
+                pivots[i] = (other_bit, other_mask ^ mask, other_parity ^ parity)
+        pivots.append((bit, mask, parity))
+    return [(mask, parity) for _, mask, parity in pivots]
@@ -0,0 +1,277 @@
+"""
+Cube-and-conquer: split a hard formula into cubes (partial assignments)
+with a lookahead cuber, then solve the cubes in parallel.
+
+Each worker keeps one incremental CDCLSolver and solves cube after cube as
+assumptions, so clauses learned on one cube help with the next. Cubes are
+handed out from a queue server (a multiprocessing manager listening on TCP),
+which lets workers on other machines of the LAN join with run_worker().
+A worker holds a lease on the cube it is solving and renews it from a
+background thread; the cube of a worker that stops renewing (it died or
+lost the network) goes back on the queue.
+"""
+
+import heapq
+import ipaddress
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from multiprocessing.managers import BaseManager
+
+from sat_solver import CDCLSolver
+
+
+def make_cubes(solver, depth=8, candidates=20):
+    """Split the solver's formula into at most 2**depth cubes.
+
+    At every node the `candidates` most active unassigned variables are
+    probed both ways with unit propagation, and the node is split on the one
+    maximising (implied_true + 1) * (implied_false + 1), which favours
+    balanced subtrees. A probe that conflicts fixes the variable the other
+    way instead (failed literal), and a node whose probes both conflict is
+    dropped as refuted. An empty result means the formula is UNSAT.
+    """
+    activity = solver.variable_activity
+    cubes = []
+    frontier = [([], 0)]
+    while frontier:
+        cube, splits = frontier.pop()
+        ok, implied = solver.propagate(cube)
+        if not ok:
+            continue
+        if splits >= depth:
+            cubes.append(cube)
+            continue
+
+        assigned = {abs(lit) for lit in implied}
+        assigned.update(abs(lit) for lit in solver.trail)
+        pool = (var for var in range(1, solver.num_vars + 1) if var not in assigned)
+        best_var = None
+        best_score = -1
+        for var in heapq.nlargest(candidates, pool, key=activity.__getitem__):
+            ok_pos, implied_pos = solver.propagate(cube + [var])
+            ok_neg, implied_neg = solver.propagate(cube + [-var])
+            if not ok_pos or not ok_neg:
+                if ok_pos or ok_neg:
+                    # Failed literal: keep only the side that survives
+                    frontier.append((cube + [var if ok_pos else -var], splits))
+                break
+            score = (len(implied_pos) + 1) * (len(implied_neg) + 1)
+            if score > best_score:
+                best_var = var
+                best_score = score
+        else:
+            if best_var is None:
+                # Everything is assigned: nothing left to split on
+                cubes.append(cube)
+            else:
+                frontier.append((cube + [-best_var], splits + 1))
+                frontier.append((cube + [best_var], splits + 1))
+    return cubes
+
+
+class _ServerState:
+    """The formula, progress flags and cube leases shared through the queue server."""
+
+    def __init__(self, literals, tasks):
+        self.literals = literals
+        self.tasks = tasks
+        self.finished = threading.Event()
+        # Worker id -> (cube, time of the last renewal)
+        self.leases = {}
+        self.lock = threading.Lock()
+
+    def formula(self):
+        return self.literals
+
+    def take(self, worker, timeout):
+        """The next cube for `worker`, leased to it; None if there is none yet."""
+        try:
+            cube = self.tasks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self.lock:
+            self.leases[worker] = (cube, time.monotonic())
+        return cube
+
+    def renew(self, worker):
+        with self.lock:
+            if worker in self.leases:
+                self.leases[worker] = (self.leases[worker][0], time.monotonic())
+
+    def release(self, worker):
+        with self.lock:
+            self.leases.pop(worker, None)
+
+    def requeue_expired(self, timeout):
+        """Put back the cubes whose lease was not renewed for `timeout` seconds."""
+        now = time.monotonic()
+        with self.lock:
+            expired = [worker for worker, (_, renewed) in self.leases.items() if now - renewed > timeout]
+            for worker in expired:
+                self.tasks.put(self.leases.pop(worker)[0])
+        return len(expired)
+
+    def finish(self):
+        self.finished.set()
+
+    def is_finished(self):
+        return self.finished.is_set()
+
+
+_server = {}
+
+
+def _init_server(literals):
+    _server["tasks"] = queue.Queue()
+    _server["state"] = _ServerState(literals, _server["tasks"])
+    _server["results"] = queue.Queue()
+
+
+def _get_state():
+    return _server["state"]
+
+
+def _get_tasks():
+    return _server["tasks"]
+
+
+def _get_results():
+    return _server["results"]
+
+
+class CubeManager(BaseManager):
+    """Queue server; the stand-in for a distributed work queue."""
+
+
+CubeManager.register("state", callable=_get_state)
+CubeManager.register("tasks", callable=_get_tasks)
+CubeManager.register("results", callable=_get_results)
+
+
+def _renew_leases(state, worker, stop, interval):
+    # Proxies open one connection per thread, so this does not interleave
+    # with the solving thread's calls
+    try:
+        while not stop.wait(interval):
+            state.renew(worker)
+    except (EOFError, ConnectionError):
+        pass
+
+
+def run_worker(address, authkey, lease_interval=1.0):
+    """Connect to a cube server and solve cubes until it says stop.
+
+    This is what runs on every worker machine (and in every local worker
+    process). Results go back as (cube, is_sat, assignment). The lease on
+    the current cube is renewed every `lease_interval` seconds, which
+    must be well below the server's lease timeout.
+    """
+    manager = CubeManager(address=address, authkey=authkey)
+    manager.connect()
+    state = manager.state()
+    results = manager.results()
+    worker = uuid.uuid4().hex
+
+    solver = CDCLSolver(debug=False)
+    solver.add_clauses_flat(state.formula())
+    stop = threading.Event()
+    threading.Thread(target=_renew_leases, args=(state, worker, stop, lease_interval), daemon=True).start()
+    try:
+        while not state.is_finished():
+            cube = state.take(worker, 0.2)
+            if cube is None:
+                continue
+            is_sat, assignment = solver.solve(assumptions=cube)
+            results.put((cube, is_sat, assignment))
+            state.release(worker)
+    except (EOFError, ConnectionError):
+        # The server shut down (the search is over)
+        pass
+    finally:
+        stop.set()
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def solve_cubes(clauses, num_workers=None, depth=None, candidates=20,
+                address=("127.0.0.1", 0), authkey=None, lease_timeout=10.0):
+    """Cube-and-conquer solve; returns (is_sat, assignment) like solve().
+
+    Local workers are started automatically; pass a reachable `address`
+    (e.g. ("0.0.0.0", 50000)) to let run_worker() on other machines help.
+    The server exchanges pickles, so anyone holding `authkey` can run code
+    in it: a random key is made for loopback addresses, and any other
+    address needs an explicit secret key that remote workers are given
+    out of band. The first SAT cube ends the search; UNSAT needs every
+    cube refuted. Remote workers are not stopped when a SAT answer
+    arrives: they finish their current cube and then lose the server.
+    A cube whose worker has not renewed its lease for `lease_timeout`
+    seconds is handed out again.
+    """
+    if authkey is None:
+        if not _is_loopback(address[0]):
+            raise ValueError("A non-loopback address needs an explicit authkey")
+        authkey = os.urandom(32)
+    num_workers = num_workers or multiprocessing.cpu_count()
+    if depth is None:
+        # A few cubes per worker so that idle workers can pick up slack
+        depth = max(1, (4 * num_workers - 1).bit_length())
+
+    literals = [lit for clause in clauses for lit in (*clause, 0)]
+    solver = CDCLSolver(debug=False)
+    solver.add_clauses_flat(literals)
+    cubes = make_cubes(solver, depth, candidates)
+    if not cubes:
+        return False, {}
+
+    manager = CubeManager(address=address, authkey=authkey)
+    manager.start(_init_server, (literals,))
+    workers = []
+    try:
+        state = manager.state()
+        tasks = manager.tasks()
+        results = manager.results()
+        for cube in cubes:
+            tasks.put(cube)
+
+        context = multiprocessing.get_context()
+        workers = [context.Process(target=run_worker, args=(manager.address, authkey), daemon=True)
+                   for _ in range(num_workers)]
+        for process in workers:
+            process.start()
+
+        # A requeued cube can be answered twice
+        remaining = {tuple(cube) for cube in cubes}
+        while remaining:
+            try:
+                cube, is_sat, assignment = results.get(timeout=0.5)
+            except queue.Empty:
+                state.requeue_expired(lease_timeout)
+                if not any(process.is_alive() for process in workers):
+                    raise RuntimeError("All cube workers exited before the search finished")
+                continue
+            if is_sat:
+                return True, assignment
+            remaining.discard(tuple(cube))
+        return False, {}
+    finally:
+        try:
+            state.finish()
+        except Exception:
+            pass
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        manager.shutdown()
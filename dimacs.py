@@ -0,0 +1,179 @@
+"""
+DIMACS CNF reading and writing.
+
+The reader streams the file in large chunks (memory-mapped for plain files,
+decompressed on the fly for .gz/.bz2/.xz) and turns each chunk into one flat
+array of zero-terminated literals, which CDCLSolver.add_clauses_flat takes in
+bulk.
+"""
+
+import bz2
+import gzip
+import lzma
+import mmap
+from array import array
+
+# Small enough that the transient token list of one chunk stays modest
+CHUNK_SIZE = 1 << 22
+
+_OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+}
+
+
+def _compressed_opener(path):
+    for suffix, opener in _OPENERS.items():
+        if str(path).endswith(suffix):
+            return opener
+    return None
+
+
+def _iter_blocks(path, chunk_size):
+    """Yield raw byte blocks of the file that end on a line boundary."""
+    opener = _compressed_opener(path)
+    if opener is not None:
+        with opener(path, "rb") as f:
+            rest = b""
+            while True:
+                block = f.read(chunk_size)
+                if not block:
+                    break
+                block = rest + block
+                cut = block.rfind(b"\n") + 1
+                if cut == 0:
+                    rest = block
+                    continue
+                rest = block[cut:]
+                yield block[:cut]
+            if rest:
+                yield rest
+        return
+
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return
+        with data:
+            size = len(data)
+            pos = 0
+            while pos < size:
+                end = min(pos + chunk_size, size)
+                if end < size:
+                    cut = data.rfind(b"\n", pos, end)
+                    if cut >= pos:
+                        end = cut + 1
+                    else:
+                        # A single line longer than the chunk size
+                        newline = data.find(b"\n", end)
+                        end = size if newline < 0 else newline + 1
+                yield data[pos:end]
+                pos = end
+
+
+class DimacsReader:
+    """Streaming DIMACS parser.
+
+    Iterating yields flat arrays of literals; every array ends with the 0
+    that terminates its last clause, so a clause never straddles two. The
+    `p cnf` header values are available in `num_vars` and `num_clauses`
+    once the first chunk has been read.
+    """
+
+    __slots__ = ("path", "chunk_size", "num_vars", "num_clauses", "finished")
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.num_vars = 0
+        self.num_clauses = 0
+        self.finished = False
+
+    def _strip_lines(self, block):
+        kept = []
+        for line in block.split(b"\n"):
+            stripped = line.lstrip()
+            if not stripped:
+                continue
+            first = stripped[:1]
+            if first == b"c":
+                continue
+            if first == b"p":
+                fields = stripped.split()
+                if len(fields) < 4 or fields[1] != b"cnf":
+                    raise ValueError(f"Bad DIMACS header: {line.decode(errors='replace')}")
+                self.num_vars = int(fields[2])
+                self.num_clauses = int(fields[3])
+                continue
+            if first == b"%":
+                # SATLIB end marker; nothing after it is a clause
+                self.finished = True
+                break
+            kept.append(line)
+        return b"\n".join(kept)
+
+    def __iter__(self):
+        pending = array("i")
+        for block in _iter_blocks(self.path, self.chunk_size):
+            # Digits, signs and whitespace never contain these bytes
+            if b"c" in block or b"p" in block or b"%" in block:
+                block = self._strip_lines(block)
+            literals = array("i", map(int, block.split()))
+            if pending:
+                literals = pending + literals
+
+            # Holding back a clause that continues in the next block
+            cut = len(literals)
+            while cut and literals[cut - 1] != 0:
+                cut -= 1
+            pending = literals[cut:]
+            if cut:
+                del literals[cut:]
+                yield literals
+            if self.finished:
+                break
+        if pending:
+            pending.append(0)
+            yield pending
+
+
+def load_dimacs(solver, path, chunk_size=CHUNK_SIZE):
+    """Feed every clause of a DIMACS file into `solver` in bulk.
+
+    Returns the reader so the caller can look at the header counts.
+    """
+    reader = DimacsReader(path, chunk_size)
+    for literals in reader:
+        solver.add_clauses_flat(literals)
+    return reader
+
+
+def read_dimacs(path, chunk_size=CHUNK_SIZE):
+    """Return (num_vars, clauses) with clauses as lists of ints."""
+    reader = DimacsReader(path, chunk_size)
+    clauses = []
+    for literals in reader:
+        start = 0
+        end = len(literals)
+        while start < end:
+            stop = literals.index(0, start)
+            clauses.append(literals[start:stop].tolist())
+            start = stop + 1
+    num_vars = max([reader.num_vars] + [abs(lit) for clause in clauses for lit in clause])
+    return num_vars, clauses
+
+
+def write_dimacs(path, clauses, num_vars=None, comments=()):
+    """Write clauses in DIMACS CNF format, compressing by file suffix."""
+    if num_vars is None:
+        num_vars = max((abs(lit) for clause in clauses for lit in clause), default=0)
+    opener = _compressed_opener(path) or open
+    with opener(path, "wt") as f:
+        for comment in comments:
+            f.write(f"c {comment}\n")
+        f.write(f"p cnf {num_vars} {len(clauses)}\n")
+        f.writelines(" ".join(map(str, clause)) + " 0\n" for clause in clauses)
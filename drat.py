@@ -0,0 +1,307 @@
+"""
+DRAT proofs: writing them while solving, and a small checker.
+
+A DRAT proof lists every clause the solver adds beyond the input (learned
+clauses, inprocessing and preprocessing results) and, optionally, every
+clause it deletes, ending with the empty clause. A checker replays it
+against the original formula and confirms each added clause by reverse
+unit propagation (RUP) or, failing that, as a resolution asymmetric
+tautology (RAT) on its first literal.
+
+The binary format writes "a" or "d", each literal as the variable-length
+7-bit encoding of 2 * var (+1 if negative), then a 0 byte; it is about
+half the size of the text format and cheaper to produce.
+
+    python -m drat formula.cnf proof.drat
+"""
+
+import sys
+from collections import defaultdict
+
+from dimacs import _compressed_opener, read_dimacs
+
+# Bytes that can appear in a text proof
+TEXT_BYTES = frozenset(b"0123456789-d \t\r\n")
+
+
+class DratWriter:
+    """Buffered proof output to a path (compressed by suffix) or a file.
+
+    A file object, e.g. a pipe to an external checker, must be open in
+    binary mode and is not closed by close().
+    """
+
+    def __init__(self, target, binary=True, buffer_size=1 << 20):
+        if isinstance(target, (str, bytes)) or hasattr(target, "__fspath__"):
+            opener = _compressed_opener(target) or open
+            self.file = opener(target, "wb")
+            self.owned = True
+        else:
+            self.file = target
+            self.owned = False
+        self.binary = binary
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+
+    def _write(self, tag, clause):
+        buffer = self.buffer
+        if self.binary:
+            buffer.append(tag)
+            for lit in clause:
+                code = 2 * lit if lit > 0 else 1 - 2 * lit
+                while code > 127:
+                    buffer.append(code & 127 | 128)
+                    code >>= 7
+                buffer.append(code)
+            buffer.append(0)
+        else:
+            line = " ".join(map(str, clause))
+            if tag == 100:
+                line = "d " + line if line else "d"
+            buffer += (line + " 0\n" if line else "0\n").encode()
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def add(self, clause):
+        self._write(97, clause)
+
+    def delete(self, clause):
+        self._write(100, clause)
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        if self.owned:
+            self.file.close()
+
+
+def read_proof(data):
+    """Yield (deleted, literals) steps from proof bytes, binary or text."""
+    if any(byte not in TEXT_BYTES for byte in data[:1024]):
+        yield from _read_binary(data)
+        return
+    deleted = False
+    literals = []
+    for token in data.split():
+        if token == b"d":
+            deleted = True
+        elif token == b"0":
+            yield deleted, literals
+            deleted = False
+            literals = []
+        else:
+            literals.append(int(token))
+
+
+def _read_binary(data):
+    i = 0
+    end = len(data)
+    while i < end:
+        tag = data[i]
+        if tag not in (97, 100):
+            raise ValueError(f"Bad binary DRAT step tag {tag} at byte {i}")
+        i += 1
+        literals = []
+        while True:
+            code = 0
+            shift = 0
+            while True:
+                byte = data[i]
+                i += 1
+                code |= (byte & 127) << shift
+                shift += 7
+                if byte < 128:
+                    break
+            if code == 0:
+                break
+            literals.append(-(code >> 1) if code & 1 else code >> 1)
+        yield tag == 100, literals
+
+
+class DratChecker:
+    """Forward DRAT checking with two watched literals.
+
+    Top-level units are kept on a trail that is never undone; like
+    drat-trim, deletions of unit clauses are ignored.
+    """
+
+    def __init__(self, clauses):
+        self.clauses = []
+        self.active = []
+        self.index = defaultdict(list)
+        self.watches = defaultdict(list)
+        self.value = {}
+        self.trail = []
+        self.qhead = 0
+        self.inconsistent = False
+        for clause in clauses:
+            self.add(clause)
+
+    def _assign(self, lit):
+        self.value[lit] = True
+        self.value[-lit] = False
+        self.trail.append(lit)
+
+    def _propagate(self):
+        """Unit propagation over the trail; False on a conflict."""
+        value = self.value
+        clauses = self.clauses
+        active = self.active
+        watches = self.watches
+        trail = self.trail
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            watching = watches[false_lit]
+            kept = []
+            conflict = False
+            for k, cid in enumerate(watching):
+                if not active[cid]:
+                    continue
+                clause = clauses[cid]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if value.get(clause[0]) is True:
+                    kept.append(cid)
+                    continue
+                for j in range(2, len(clause)):
+                    if value.get(clause[j]) is not False:
+                        clause[1], clause[j] = clause[j], clause[1]
+                        watches[clause[1]].append(cid)
+                        break
+                else:
+                    kept.append(cid)
+                    if value.get(clause[0]) is False:
+                        kept.extend(watching[k + 1:])
+                        conflict = True
+                        break
+                    self._assign(clause[0])
+            watches[false_lit] = kept
+            if conflict:
+                return False
+        return True
+
+    def _undo(self, size):
+        value = self.value
+        for lit in self.trail[size:]:
+            del value[lit]
+            del value[-lit]
+        del self.trail[size:]
+        self.qhead = size
+
+    def _rup(self, clause):
+        size = len(self.trail)
+        value = self.value
+        conflict = False
+        for lit in clause:
+            current = value.get(lit)
+            if current is True:
+                conflict = True
+                break
+            if current is None:
+                self._assign(-lit)
+        if not conflict:
+            conflict = not self._propagate()
+        self._undo(size)
+        return conflict
+
+    def _rat(self, clause):
+        if not clause:
+            return False
+        pivot = clause[0]
+        for cid, other in enumerate(self.clauses):
+            if self.active[cid] and -pivot in other:
+                if not self._rup(clause + [lit for lit in other if lit != -pivot]):
+                    return False
+        return True
+
+    def add(self, clause, check=False):
+        """Add a clause; with `check`, first confirm that it is RUP or RAT."""
+        if self.inconsistent:
+            return True
+        clause = list(dict.fromkeys(clause))
+        if check and not self._rup(clause) and not self._rat(clause):
+            return False
+        value = self.value
+        # Open literals first, so they get watched
+        clause.sort(key=lambda lit: value.get(lit) is False)
+        open_count = sum(value.get(lit) is not False for lit in clause)
+        if any(value.get(lit) is True for lit in clause):
+            open_count = max(open_count, 2)
+        cid = len(self.clauses)
+        self.clauses.append(clause)
+        self.active.append(True)
+        self.index[tuple(sorted(clause))].append(cid)
+        if len(clause) >= 2:
+            self.watches[clause[0]].append(cid)
+            self.watches[clause[1]].append(cid)
+        if open_count == 0:
+            self.inconsistent = True
+        elif open_count == 1:
+            if value.get(clause[0]) is None:
+                self._assign(clause[0])
+            if not self._propagate():
+                self.inconsistent = True
+        return True
+
+    def delete(self, clause):
+        ids = self.index.get(tuple(sorted(set(clause))))
+        if not ids or len(clause) == 1:
+            return
+        cid = ids.pop()
+        self.active[cid] = False
+
+
+def check_proof(clauses, proof):
+    """Check a DRAT refutation of `clauses`.
+
+    `proof` is the proof as bytes. Returns (True, None) if it derives the
+    empty clause, otherwise (False, reason).
+    """
+    checker = DratChecker(clauses)
+    if checker.inconsistent:
+        return True, None
+    for step, (deleted, literals) in enumerate(read_proof(proof), 1):
+        if deleted:
+            checker.delete(literals)
+            continue
+        if not checker.add(literals, check=True):
+            return False, f"step {step}: lemma {literals} is neither RUP nor RAT"
+        if checker.inconsistent:
+            return True, None
+    return False, "the proof does not derive the empty clause"
+
+
+def check_proof_file(cnf_path, proof_path):
+    """check_proof for a DIMACS file and a (possibly compressed) proof file."""
+    _, clauses = read_dimacs(cnf_path)
+    opener = _compressed_opener(proof_path) or open
+    with opener(proof_path, "rb") as f:
+        proof = f.read()
+    return check_proof(clauses, proof)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m drat",
+                                     description="Check a DRAT proof (binary or text) of a DIMACS formula.")
+    parser.add_argument("formula", help="CNF file")
+    parser.add_argument("proof", help="DRAT proof file")
+    args = parser.parse_args(argv)
+    verified, reason = check_proof_file(args.formula, args.proof)
+    if verified:
+        print("s VERIFIED")
+        return 0
+    print(f"c {reason}")
+    print("s NOT VERIFIED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
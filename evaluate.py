@@ -0,0 +1,154 @@
+"""
+Vectorized model checking with NumPy.
+
+BatchEvaluator packs a formula once into CSR-style arrays (flat literals
+plus clause offsets) and then checks many assignments against every clause
+at once. Assignments are bit-packed 64 per machine word, so one pass of
+XOR and OR-reductions over the literal array evaluates 64 models; memory
+traffic, not Python, sets the speed.
+
+NumPy is only needed here and is imported on first use.
+"""
+
+# Upper bound on the temporary literal-by-word matrix, in bytes
+BLOCK_BYTES = 1 << 26
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("evaluate.BatchEvaluator needs NumPy (pip install numpy)") from e
+    return numpy
+
+
+class BatchEvaluator:
+    """A formula in CSR form, ready to evaluate batches of assignments.
+
+    `literals` holds the literals of every clause back to back and clause i
+    spans literals[offsets[i]:offsets[i + 1]]. Models are given as a
+    boolean array of shape (batch, num_vars), column j being variable j + 1,
+    or as a list of assignment dicts like the ones solve() returns.
+    """
+
+    def __init__(self, clauses, num_vars=None):
+        np = _numpy()
+        clauses = list(clauses)
+        lengths = np.fromiter(map(len, clauses), dtype=np.int64, count=len(clauses))
+        literals = np.fromiter((lit for clause in clauses for lit in clause),
+                               dtype=np.int64, count=int(lengths.sum()))
+        self._pack(literals, lengths, num_vars)
+
+    @classmethod
+    def from_flat(cls, literals, num_vars=None):
+        """Build from zero-terminated clauses, e.g. a DimacsReader chunk."""
+        np = _numpy()
+        evaluator = cls.__new__(cls)
+        flat = np.asarray(literals, dtype=np.int64)
+        if flat.size and flat[-1] != 0:
+            flat = np.append(flat, 0)
+        zeros = np.flatnonzero(flat == 0)
+        lengths = np.diff(np.concatenate(([-1], zeros))) - 1
+        evaluator._pack(flat[flat != 0], lengths, num_vars)
+        return evaluator
+
+    def _pack(self, literals, lengths, num_vars):
+        np = _numpy()
+        self.num_clauses = len(lengths)
+        self.offsets = np.zeros(self.num_clauses + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.literals = literals.astype(np.int32)
+        top = int(np.abs(literals).max()) if literals.size else 0
+        self.num_vars = max(num_vars or 0, top)
+
+        # Column of every literal's variable, and an all-ones XOR mask for
+        # negative literals
+        self.columns = (np.abs(literals) - 1).astype(np.intp)
+        self.flip = np.where(literals < 0, np.uint64(~np.uint64(0)), np.uint64(0))
+        # reduceat cannot express empty clauses; they are simply never satisfied
+        self.nonempty = np.flatnonzero(lengths > 0)
+        self.starts = self.offsets[self.nonempty]
+
+    def models_array(self, models):
+        """Return `models` as a (batch, num_vars) boolean array."""
+        np = _numpy()
+        if isinstance(models, dict):
+            models = [models]
+        if isinstance(models, (list, tuple)) and models and isinstance(models[0], dict):
+            array = np.zeros((len(models), self.num_vars), dtype=bool)
+            for row, model in zip(array, models):
+                for var, value in model.items():
+                    if value and var <= self.num_vars:
+                        row[var - 1] = True
+            return array
+        array = np.asarray(models, dtype=bool)
+        if array.ndim == 1:
+            array = array[np.newaxis]
+        if array.shape[1] < self.num_vars:
+            raise ValueError(f"Models have {array.shape[1]} variables, the formula {self.num_vars}")
+        return array
+
+    def _clause_words(self, models):
+        """Bit-packed clause values: bit k of row i is clause i under model k."""
+        np = _numpy()
+        models = self.models_array(models)
+        batch = len(models)
+        # Bit-pack along the batch: row v holds variable v + 1 in all models
+        packed = np.packbits(np.ascontiguousarray(models[:, :self.num_vars].T), axis=1, bitorder="little")
+        words = -(-packed.shape[1] // 8)
+        padded = np.zeros((self.num_vars, words * 8), dtype=np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        values = padded.view(np.uint64)
+
+        result = np.zeros((self.num_clauses, words), dtype=np.uint64)
+        nonempty = self.nonempty
+        starts = self.starts
+        offsets = self.offsets
+        # Processing clauses in blocks keeps the temporary matrix bounded
+        block = max(1, BLOCK_BYTES // (8 * words))
+        first = 0
+        while first < len(nonempty):
+            begin = starts[first]
+            last = int(np.searchsorted(starts, begin + block, side="left"))
+            last = max(last, first + 1)
+            end = offsets[nonempty[last - 1] + 1]
+            true_words = values[self.columns[begin:end]]
+            true_words ^= self.flip[begin:end, np.newaxis]
+            result[nonempty[first:last]] = np.bitwise_or.reduceat(true_words, starts[first:last] - begin, axis=0)
+            first = last
+        return result, batch
+
+    @staticmethod
+    def _unpack(words, batch):
+        np = _numpy()
+        return np.unpackbits(words.view(np.uint8), axis=-1, count=batch, bitorder="little").astype(bool)
+
+    def clause_status(self, models):
+        """Return a (batch, num_clauses) boolean array: clause satisfied?"""
+        result, batch = self._clause_words(models)
+        return self._unpack(result, batch).T
+
+    def check(self, models):
+        """Return one boolean per model: does it satisfy every clause?"""
+        np = _numpy()
+        result, batch = self._clause_words(models)
+        if not self.num_clauses:
+            return np.ones(batch, dtype=bool)
+        return self._unpack(np.bitwise_and.reduce(result, axis=0), batch)
+
+    def unsatisfied(self, models):
+        """Return, per model, the indices of the clauses it falsifies."""
+        np = _numpy()
+        result, batch = self._clause_words(models)
+        # Only clauses false in some model are unpacked
+        mask = np.full(result.shape[1], ~np.uint64(0), dtype=np.uint64)
+        if batch % 64:
+            mask[-1] = np.uint64((1 << (batch % 64)) - 1)
+        failing = np.flatnonzero(((result & mask) != mask).any(axis=1))
+        status = self._unpack(result[failing], batch)
+        return [failing[~status[:, k]] for k in range(batch)]
+
+
+def check_models(clauses, models):
+    """One-shot convenience: which of `models` satisfy `clauses`?"""
+    return BatchEvaluator(clauses).check(models)
@@ -9,7 +9,7 @@ def run_example(name, clauses):
     """Run a single example and print results."""
     print(f"\n{'='*50}")
     print(f"Testing: {name}")
-    solver = CDCLSolver()
+    solver = CDCLSolver(debug=True)
     
     for clause in clauses:
         solver.add_clause(clause)
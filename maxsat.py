@@ -0,0 +1,308 @@
+"""
+Weighted partial MaxSAT: minimise the total weight of falsified soft
+clauses subject to the hard clauses.
+
+MaxSATSolver runs core-guided OLL search in the style of RC2 on a single
+incremental CDCLSolver. Soft clauses are assumed satisfied through their
+selector literals; each UNSAT answer yields a core of assumptions, raises
+the lower bound by the core's smallest weight and relaxes the core with a
+totalizer whose outputs become new, weighted assumptions. Stratification
+assumes the heaviest soft clauses first, so SAT answers along the way give
+upper bounds (reported through on_improve) long before optimality.
+
+    python -m maxsat formula.wcnf
+"""
+
+import sys
+import time
+
+from dimacs import _compressed_opener
+from sat_solver import UNKNOWN, CDCLSolver
+
+
+def read_wcnf(path):
+    """Return (num_vars, hard, soft) from a WCNF file.
+
+    `soft` holds (weight, clause) pairs. Both the "p wcnf ... top" format
+    and the newer one with "h" marking hard clauses are read.
+    """
+    opener = _compressed_opener(path) or open
+    num_vars = 0
+    top = None
+    hard = []
+    soft = []
+    with opener(path, "rt") as f:
+        for line in f:
+            fields = line.split()
+            if not fields or fields[0] == "c":
+                continue
+            if fields[0] == "p":
+                if len(fields) < 4 or fields[1] != "wcnf":
+                    raise ValueError(f"Bad WCNF header: {line.strip()}")
+                num_vars = int(fields[2])
+                if len(fields) > 4:
+                    top = int(fields[4])
+                continue
+            if fields[-1] != "0":
+                raise ValueError(f"Unterminated WCNF clause: {line.strip()}")
+            clause = [int(field) for field in fields[1:-1]]
+            if fields[0] == "h":
+                hard.append(clause)
+                continue
+            weight = int(fields[0])
+            if top is not None and weight >= top:
+                hard.append(clause)
+            else:
+                soft.append((weight, clause))
+    num_vars = max([num_vars] + [abs(lit) for clause in hard for lit in clause]
+                   + [abs(lit) for _, clause in soft for lit in clause])
+    return num_vars, hard, soft
+
+
+class MaxSATSolver:
+    """Core-guided (OLL) weighted partial MaxSAT on one CDCLSolver.
+
+    `config` holds CDCLSolver keyword arguments. on_improve(cost, model)
+    is called whenever a better solution is found. Variables above
+    `num_vars` and those of the clauses given before solve() go to
+    selectors and totalizers, so later clauses must not use them.
+    """
+
+    def __init__(self, hard=(), soft=(), num_vars=0, stratify=True, trim=3, config=None, on_improve=None):
+        self.solver = CDCLSolver(**(config or {}))
+        self.stratify = stratify
+        # Core trimming: re-solve a core under its own assumptions up to
+        # `trim` times while that keeps shrinking it
+        self.trim = trim
+        self.on_improve = on_improve
+        self.num_vars = num_vars
+        self.top = num_vars
+        self.soft = []
+        self.pending = []
+        # Assumption literal -> remaining weight, and for totalizer outputs
+        # the outputs list and index the literal negates
+        self.weights = {}
+        self.sums = {}
+        self.lower_bound = 0
+        self.best_cost = None
+        self.best_model = {}
+        self.optimal = False
+        self.cores = 0
+        self.sat_calls = 0
+        for clause in hard:
+            self.add_hard(clause)
+        for weight, clause in soft:
+            self.add_soft(clause, weight)
+
+    def _new_var(self):
+        self.top += 1
+        return self.top
+
+    def _see(self, clause):
+        top = max((abs(lit) for lit in clause), default=0)
+        if top > self.num_vars:
+            self.num_vars = top
+            self.top = max(self.top, top)
+
+    def add_hard(self, clause):
+        clause = list(clause)
+        self._see(clause)
+        self.solver.add_clause(clause)
+
+    def add_soft(self, clause, weight=1):
+        """Add a soft clause; falsifying it costs `weight` (> 0)."""
+        if weight <= 0:
+            raise ValueError("Soft clause weights must be positive")
+        clause = list(dict.fromkeys(clause))
+        self._see(clause)
+        self.soft.append((weight, clause))
+        self.pending.append((weight, clause))
+
+    def _activate_pending(self):
+        # Units are assumed directly; longer clauses get a selector s with
+        # the hard clause (clause or not s)
+        for weight, clause in self.pending:
+            if not clause:
+                self.lower_bound += weight
+                continue
+            if any(-lit in clause for lit in clause):
+                continue
+            if len(clause) == 1:
+                lit = clause[0]
+            else:
+                lit = self._new_var()
+                self.solver.add_clause(clause + [-lit])
+            self.weights[lit] = self.weights.get(lit, 0) + weight
+        if self.pending and self.best_cost is not None:
+            # The best model may falsify the new soft clauses
+            self.best_cost = self.cost(self.best_model)
+        self.pending = []
+
+    def cost(self, model):
+        """Total weight of the soft clauses `model` falsifies."""
+        return sum(weight for weight, clause in self.soft
+                   if not any(model.get(abs(lit), False) == (lit > 0) for lit in clause))
+
+    def _improve(self, model):
+        cost = self.cost(model)
+        if self.best_cost is None or cost < self.best_cost:
+            self.best_cost = cost
+            self.best_model = {var: model.get(var, False) for var in range(1, self.num_vars + 1)}
+            if self.on_improve is not None:
+                self.on_improve(cost, self.best_model)
+
+    def _totalizer(self, inputs):
+        """Outputs o with o[j] true whenever more than j inputs are true."""
+        if len(inputs) == 1:
+            return inputs
+        middle = len(inputs) // 2
+        left = self._totalizer(inputs[:middle])
+        right = self._totalizer(inputs[middle:])
+        outputs = [self._new_var() for _ in inputs]
+        add_clause = self.solver.add_clause
+        for i in range(len(left) + 1):
+            for j in range(len(right) + 1):
+                if i + j:
+                    clause = [outputs[i + j - 1]]
+                    if i:
+                        clause.append(-left[i - 1])
+                    if j:
+                        clause.append(-right[j - 1])
+                    add_clause(clause)
+        return outputs
+
+    def _relax(self, core):
+        """Raise the lower bound by the core's weight and relax the core."""
+        weights = self.weights
+        weight = min(weights[lit] for lit in core)
+        self.lower_bound += weight
+        self.cores += 1
+        for lit in core:
+            weights[lit] -= weight
+            if not weights[lit]:
+                del weights[lit]
+            # A violated bound sum <= j moves on to sum <= j + 1
+            if lit in self.sums:
+                outputs, j = self.sums[lit]
+                if j + 1 < len(outputs):
+                    self._assume_sum(outputs, j + 1, weight)
+        if len(core) > 1:
+            # At least one core literal is false; more costs `weight` each
+            self._assume_sum(self._totalizer([-lit for lit in core]), 1, weight)
+
+    def _assume_sum(self, outputs, j, weight):
+        lit = -outputs[j]
+        self.sums[lit] = (outputs, j)
+        self.weights[lit] = self.weights.get(lit, 0) + weight
+
+    def _assumptions(self, threshold):
+        # An assumption heavier than the gap to the best cost holds in
+        # every optimal solution, so it is hardened by assuming it below the
+        # threshold too. It is not added as a unit: soft clauses added later
+        # can move the optimum.
+        gap = None if self.best_cost is None else self.best_cost - self.lower_bound
+        return [lit for lit, weight in self.weights.items()
+                if weight >= threshold or gap is not None and weight > gap]
+
+    def solve(self, time_budget=None, conflict_budget=None):
+        """Minimise the cost of the soft clauses.
+
+        Returns (True, model) like CDCLSolver.solve, with the cost in
+        best_cost, or (False, {}) if the hard clauses are unsatisfiable.
+        When a budget runs out, the best model so far is returned and
+        `optimal` stays False; without one the answer is (UNKNOWN, {}).
+        Calling solve() again resumes from the bounds reached, also after
+        add_soft().
+        """
+        start = time.perf_counter()
+        solver = self.solver
+        stats = solver.stats
+        self._activate_pending()
+        self.optimal = False
+        deadline = None if time_budget is None else start + time_budget
+        conflict_limit = None if conflict_budget is None else stats.conflicts + conflict_budget
+
+        def budgets():
+            return {
+                "time_budget": None if deadline is None else max(0.0, deadline - time.perf_counter()),
+                "conflict_budget": None if conflict_limit is None else max(0, conflict_limit - stats.conflicts),
+            }
+
+        threshold = max(self.weights.values(), default=0) if self.stratify else 1
+        while True:
+            if self.best_cost is not None and self.best_cost <= self.lower_bound:
+                self.optimal = True
+                break
+            assumptions = self._assumptions(threshold)
+            self.sat_calls += 1
+            is_sat, model = solver.solve(assumptions, **budgets())
+            if is_sat is UNKNOWN:
+                break
+            if is_sat:
+                self._improve(model)
+                lighter = [weight for weight in self.weights.values() if weight < threshold]
+                if not lighter:
+                    self.optimal = True
+                    break
+                threshold = max(lighter)
+                continue
+            core = solver.core
+            if not core:
+                return False, {}
+            for _ in range(self.trim):
+                if len(core) == 1 or solver.solve(core, **budgets())[0] is not False:
+                    break
+                # The re-solve may find the hard clauses unsatisfiable
+                if not solver.ok or not solver.core:
+                    return False, {}
+                if len(solver.core) >= len(core):
+                    break
+                core = solver.core
+            self._relax(core)
+            if self.stratify and not any(weight >= threshold for weight in self.weights.values()):
+                threshold = max(self.weights.values(), default=0)
+
+        if self.best_cost is None:
+            return UNKNOWN, {}
+        return True, self.best_model
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m maxsat",
+                                     description="Solve a weighted partial MaxSAT instance (WCNF).")
+    parser.add_argument("path", help="WCNF file")
+    parser.add_argument("--time-limit", type=float, metavar="SECONDS", help="stop after SECONDS with the best cost")
+    parser.add_argument("--no-stratify", action="store_true", help="assume every soft clause from the start")
+    parser.add_argument("--no-model", action="store_true", help="do not print the v line")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout
+    num_vars, hard, soft = read_wcnf(args.path)
+    out.write(f"c {num_vars} variables, {len(hard)} hard and {len(soft)} soft clauses\n")
+
+    def improved(cost, model):
+        out.write(f"o {cost}\n")
+        out.flush()
+
+    maxsat = MaxSATSolver(hard, soft, num_vars, stratify=not args.no_stratify, on_improve=improved)
+    try:
+        is_sat, model = maxsat.solve(time_budget=args.time_limit)
+    except KeyboardInterrupt:
+        is_sat, model = (UNKNOWN, {}) if maxsat.best_cost is None else (True, maxsat.best_model)
+    out.write(f"c {maxsat.cores} cores, {maxsat.sat_calls} SAT calls, lower bound {maxsat.lower_bound}\n")
+    if is_sat is UNKNOWN:
+        out.write("s UNKNOWN\n")
+        return 0
+    if not is_sat:
+        out.write("s UNSATISFIABLE\n")
+        return 20
+    out.write("s OPTIMUM FOUND\n" if maxsat.optimal else "s SATISFIABLE\n")
+    if not args.no_model:
+        out.write("v " + "".join("1" if model.get(var) else "0" for var in range(1, num_vars + 1)) + "\n")
+    return 30 if maxsat.optimal else 10
+
+
+if __name__ == "__main__":
+    sys.exit(main())
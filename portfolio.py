@@ -0,0 +1,173 @@
+"""
+Portfolio solving: race differently configured CDCLSolvers in separate
+processes and take the answer of whichever finishes first.
+
+Workers can optionally share short learned clauses (units and binaries)
+through a ring buffer in shared memory; each worker publishes what it learns
+and picks up the others' clauses at its restarts.
+"""
+
+import multiprocessing
+import queue
+
+from sat_solver import CDCLSolver
+
+RESTARTS = ("glucose", "luby")
+PHASES = (True, False, "random")
+DECAYS = (0.95, 0.85, 0.99, 0.9)
+
+
+def default_configs(count):
+    """Return `count` diversified CDCLSolver keyword sets.
+
+    Configurations vary the random seed, initial phase, VSIDS decay and
+    restart policy; the first one is the plain default solver.
+    """
+    configs = [{}]
+    for i in range(1, count):
+        configs.append({
+            "seed": i,
+            "initial_phase": PHASES[i % len(PHASES)],
+            "var_decay": DECAYS[i % len(DECAYS)],
+            "restart_policy": RESTARTS[i % len(RESTARTS)],
+            "random_var_freq": 0.02 if i % 4 == 3 else 0.0,
+        })
+    return configs
+
+
+class ClauseRing:
+    """Fixed-size ring of clauses in shared memory.
+
+    Word 0 counts the words ever written; the ring itself starts at word 1.
+    Each record is [worker, size, lit_1, ..., lit_size]. Readers keep their
+    own position and simply skip ahead when a writer has lapped them.
+    """
+
+    __slots__ = ("capacity", "buffer")
+
+    def __init__(self, capacity=1 << 16, context=multiprocessing):
+        self.capacity = capacity
+        self.buffer = context.Array("q", capacity + 1)
+
+    def push(self, worker, clause):
+        size = len(clause)
+        if size + 2 > self.capacity:
+            return
+        with self.buffer.get_lock():
+            words = self.buffer.get_obj()
+            position = words[0]
+            for value in (worker, size, *clause):
+                words[1 + position % self.capacity] = value
+                position += 1
+            words[0] = position
+
+    def read(self, worker, position):
+        """Return (clauses from other workers since `position`, new position)."""
+        with self.buffer.get_lock():
+            words = self.buffer.get_obj()
+            end = words[0]
+            if end - position > self.capacity:
+                # Lapped: whatever was not read has been overwritten
+                return [], end
+            data = [words[1 + i % self.capacity] for i in range(position, end)]
+
+        clauses = []
+        i = 0
+        while i < len(data):
+            size = data[i + 1]
+            if data[i] != worker:
+                clauses.append(data[i + 2:i + 2 + size])
+            i += 2 + size
+        return clauses, end
+
+
+def _worker(index, config, literals, ring, max_shared_size, results):
+    solver = CDCLSolver(debug=False, **config)
+    solver.add_clauses_flat(literals)
+
+    if ring is not None:
+        position = 0
+
+        def export(clause):
+            if len(clause) <= max_shared_size:
+                ring.push(index, clause)
+
+        def fetch():
+            nonlocal position
+            clauses, position = ring.read(index, position)
+            return clauses
+
+        solver.on_learned = export
+        solver.import_clauses = fetch
+
+    is_sat, assignment = solver.solve()
+    results.put((index, is_sat, assignment, solver.conflicts))
+
+
+class PortfolioSolver:
+    """Same add_clause/solve contract as CDCLSolver, run as a process race.
+
+    After solve(), `winner` is the index of the configuration that answered
+    and `configs[winner]` its settings.
+    """
+
+    def __init__(self, num_workers=None, configs=None, share_clauses=True,
+                 max_shared_size=2, ring_capacity=1 << 16):
+        if configs is None:
+            configs = default_configs(num_workers or multiprocessing.cpu_count())
+        self.configs = list(configs)
+        self.share_clauses = share_clauses
+        self.max_shared_size = max_shared_size
+        self.ring_capacity = ring_capacity
+        self.literals = []
+        self.winner = None
+        self.conflicts = 0
+
+    def add_clause(self, clause):
+        self.literals.extend(clause)
+        self.literals.append(0)
+
+    def add_clauses_flat(self, literals):
+        self.literals.extend(literals)
+        if self.literals and self.literals[-1] != 0:
+            self.literals.append(0)
+
+    def solve(self):
+        context = multiprocessing.get_context()
+        ring = ClauseRing(self.ring_capacity, context) if self.share_clauses else None
+        results = context.Queue()
+        workers = [
+            context.Process(target=_worker, daemon=True,
+                            args=(i, config, self.literals, ring, self.max_shared_size, results))
+            for i, config in enumerate(self.configs)
+        ]
+        for process in workers:
+            process.start()
+
+        try:
+            while True:
+                try:
+                    index, is_sat, assignment, conflicts = results.get(timeout=0.1)
+                    break
+                except queue.Empty:
+                    if not any(process.is_alive() for process in workers) and results.empty():
+                        raise RuntimeError("All portfolio workers exited without an answer")
+        finally:
+            # The race is over: stop everybody still searching
+            for process in workers:
+                if process.is_alive():
+                    process.terminate()
+            for process in workers:
+                process.join()
+
+        self.winner = index
+        self.conflicts = conflicts
+        return is_sat, assignment
+
+
+def solve_portfolio(clauses, num_workers=None, configs=None, share_clauses=True):
+    """Convenience wrapper: race a portfolio on a list of clauses."""
+    solver = PortfolioSolver(num_workers, configs, share_clauses)
+    for clause in clauses:
+        solver.add_clause(clause)
+    return solver.solve()
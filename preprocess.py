@@ -0,0 +1,297 @@
+"""
+CNF preprocessing in the style of SatELite.
+
+Preprocessor.simplify() takes clauses as lists of literals and returns an
+equisatisfiable, usually much smaller, set of clauses. It applies level-0
+facts, drops duplicate and tautological clauses, removes subsumed clauses,
+strengthens clauses by self-subsuming resolution and eliminates variables
+by clause distribution when that does not grow the formula. The clauses of
+every eliminated variable are kept so that extend_model() can complete a
+model of the simplified formula into one of the original.
+"""
+
+from collections import defaultdict
+
+
+def _signature(clause):
+    # 64-bit summary of the variables; C can only subsume D if sig(C) <= sig(D)
+    sig = 0
+    for lit in clause:
+        sig |= 1 << (abs(lit) & 63)
+    return sig
+
+
+def _subsumes(clause, other):
+    """Check `clause` against the literal set `other`.
+
+    Returns 0 if clause subsumes other, a literal of other that can be
+    removed by self-subsuming resolution, or None if neither applies.
+    """
+    flipped = 0
+    for lit in clause:
+        if lit in other:
+            continue
+        if flipped or -lit not in other:
+            return None
+        flipped = -lit
+    return flipped
+
+
+def extend_model(model, eliminated):
+    """Give every eliminated variable a value that satisfies its clauses.
+
+    `eliminated` maps variables, in elimination order, to the clauses that
+    were removed with them. Variables are restored last-eliminated first.
+    """
+    for var, clauses in reversed(eliminated.items()):
+        value = True
+        for clause in clauses:
+            pivot = var if var in clause else -var
+            if not any(lit != pivot and model.get(abs(lit)) == (lit > 0) for lit in clause):
+                value = pivot > 0
+                break
+        model[var] = value
+    return model
+
+
+class Preprocessor:
+    """One-shot simplification of a clause set.
+
+    Variables in `frozen` are never eliminated (assumption variables and
+    anything the caller wants to keep). Variable elimination is tried only
+    while neither polarity occurs in more than `max_occurrences` clauses
+    and gives up on resolvents longer than `max_resolvent_size`; `max_steps`
+    bounds the total subsumption and resolution work. With a `proof`
+    (drat.DratWriter), every added and removed clause is logged.
+    """
+
+    def __init__(self, frozen=(), max_occurrences=16, max_resolvent_size=24,
+                 max_steps=5_000_000, proof=None):
+        self.frozen = set(frozen)
+        self.proof = proof
+        self.max_occurrences = max_occurrences
+        self.max_resolvent_size = max_resolvent_size
+        self.max_steps = max_steps
+        self.steps = 0
+        self.ok = True
+        # Removed clauses of each eliminated variable, in elimination order
+        self.eliminated = {}
+        # Literals fixed at level 0, old and newly found
+        self.units = []
+        self.value = {}
+
+        self.clauses = []
+        self.signatures = []
+        self.occurs = defaultdict(set)
+        self.pending_units = []
+        self.touched = set()
+
+    def simplify(self, clauses, units=()):
+        """Return the simplified clauses, or None if they are unsatisfiable.
+
+        Units (given or derived) are not part of the result; they are
+        listed in `units`.
+        """
+        for lit in units:
+            self._assign(lit)
+        seen = set()
+        for clause in clauses:
+            clause = set(clause)
+            if any(-lit in clause for lit in clause):
+                continue
+            key = frozenset(clause)
+            if key in seen:
+                continue
+            seen.add(key)
+            self._add(clause)
+        del seen
+
+        self._propagate()
+        self._subsume()
+        self._eliminate()
+        if not self.ok:
+            return None
+        return [sorted(clause, key=abs) for clause in self.clauses if clause is not None]
+
+    def _assign(self, lit):
+        var = abs(lit)
+        if var in self.value:
+            if self.value[var] != (lit > 0):
+                self.ok = False
+            return
+        self.value[var] = lit > 0
+        self.units.append(lit)
+        self.pending_units.append(lit)
+
+    def _add(self, clause):
+        """Store a tautology-free clause after applying the fixed values."""
+        value = self.value
+        kept = []
+        for lit in clause:
+            var = abs(lit)
+            if var in value:
+                if value[var] == (lit > 0):
+                    return None
+                continue
+            kept.append(lit)
+        if self.proof is not None and len(kept) < len(clause):
+            self.proof.add(kept)
+        if not kept:
+            self.ok = False
+            return None
+        if len(kept) == 1:
+            self._assign(kept[0])
+            return None
+        cid = len(self.clauses)
+        self.clauses.append(kept)
+        self.signatures.append(_signature(kept))
+        for lit in kept:
+            self.occurs[lit].add(cid)
+        self.touched.add(cid)
+        return cid
+
+    def _remove(self, cid):
+        occurs = self.occurs
+        for lit in self.clauses[cid]:
+            occurs[lit].discard(cid)
+        self.clauses[cid] = None
+        self.touched.discard(cid)
+
+    def _strengthen(self, cid, lit):
+        clause = self.clauses[cid]
+        if self.proof is not None:
+            self.proof.add([other for other in clause if other != lit])
+            self.proof.delete(clause)
+        clause.remove(lit)
+        self.occurs[lit].discard(cid)
+        if len(clause) == 1:
+            self._remove(cid)
+            self._assign(clause[0])
+        else:
+            self.signatures[cid] = _signature(clause)
+            self.touched.add(cid)
+
+    def _propagate(self):
+        occurs = self.occurs
+        while self.pending_units and self.ok:
+            lit = self.pending_units.pop()
+            for cid in list(occurs[lit]):
+                if self.proof is not None:
+                    self.proof.delete(self.clauses[cid])
+                self._remove(cid)
+            for cid in list(occurs[-lit]):
+                if self.clauses[cid] is not None:
+                    self._strengthen(cid, -lit)
+        return self.ok
+
+    def _subsume(self):
+        """Backward subsumption and strengthening from every touched clause."""
+        clauses = self.clauses
+        while self.touched and self.ok and self.steps < self.max_steps:
+            queue = sorted(self.touched, key=lambda c: len(clauses[c]))
+            self.touched = set()
+            for cid in queue:
+                if clauses[cid] is not None:
+                    self._backward_subsume(cid)
+                if not self._propagate():
+                    return False
+        return self.ok
+
+    def _backward_subsume(self, cid):
+        clauses = self.clauses
+        signatures = self.signatures
+        occurs = self.occurs
+        clause = clauses[cid]
+        sig = signatures[cid]
+        size = len(clause)
+        # Any clause that C subsumes or strengthens contains C's rarest
+        # variable in one polarity or the other
+        best = min(clause, key=lambda lit: len(occurs[lit]) + len(occurs[-lit]))
+        candidates = list(occurs[best] | occurs[-best])
+        self.steps += len(candidates)
+        for other_id in candidates:
+            other = clauses[other_id]
+            if other_id == cid or other is None or len(other) < size or sig & ~signatures[other_id]:
+                continue
+            self.steps += size
+            result = _subsumes(clause, set(other))
+            if result is None:
+                continue
+            if result == 0:
+                if self.proof is not None:
+                    self.proof.delete(other)
+                self._remove(other_id)
+            else:
+                self._strengthen(other_id, result)
+            if clauses[cid] is None:
+                break
+
+    def _resolvents(self, var):
+        """Return the non-tautological resolvents on `var`, or None when
+        eliminating it would add clauses or overlong ones."""
+        clauses = self.clauses
+        positive = [clauses[c] for c in self.occurs[var]]
+        negative = [clauses[c] for c in self.occurs[-var]]
+        limit = len(positive) + len(negative)
+        resolvents = []
+        for pos in positive:
+            base = [lit for lit in pos if lit != var]
+            base_set = set(base)
+            for neg in negative:
+                self.steps += len(neg)
+                resolvent = list(base)
+                for lit in neg:
+                    if lit == -var or lit in base_set:
+                        continue
+                    if -lit in base_set:
+                        break
+                    resolvent.append(lit)
+                else:
+                    if len(resolvent) > self.max_resolvent_size:
+                        return None
+                    resolvents.append(resolvent)
+                    if len(resolvents) > limit:
+                        return None
+        return resolvents
+
+    def _eliminate(self):
+        """Bounded variable elimination, cheapest variables first.
+
+        After the first round only variables that shared a clause with an
+        eliminated one are worth trying again.
+        """
+        occurs = self.occurs
+        candidates = {abs(lit) for lit, cids in occurs.items() if cids}
+        while candidates and self.ok and self.steps < self.max_steps:
+            candidates -= self.frozen
+            order = sorted(candidates, key=lambda v: len(occurs[v]) * len(occurs[-v]))
+            candidates = set()
+            for var in order:
+                if self.steps >= self.max_steps or not self.ok:
+                    break
+                if var in self.value or var in self.eliminated:
+                    continue
+                positive = occurs[var]
+                negative = occurs[-var]
+                if len(positive) > self.max_occurrences or len(negative) > self.max_occurrences:
+                    continue
+                resolvents = self._resolvents(var)
+                if resolvents is None:
+                    continue
+
+                removed = list(positive | negative)
+                if self.proof is not None:
+                    # Resolvents are RUP. The eliminated clauses are not
+                    # deleted from the proof, as they come back if the
+                    # variable is used again
+                    for resolvent in resolvents:
+                        self.proof.add(resolvent)
+                self.eliminated[var] = [self.clauses[c] for c in removed]
+                for cid in removed:
+                    candidates.update(abs(lit) for lit in self.clauses[cid])
+                    self._remove(cid)
+                for resolvent in resolvents:
+                    self._add(resolvent)
+                self._propagate()
+                self._subsume()
+            candidates.difference_update(self.eliminated)
@@ -1,221 +1,1965 @@
+import heapq
+import json
+import os
+import random
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+
+from constraints import CONFLICT, MOVED, AtMost, Xor, gauss_jordan
+from drat import DratWriter
+from preprocess import Preprocessor, extend_model
+from sls import LocalSearch
+
+
+class VarOrderHeap:
+    """Indexed binary max-heap of variables ordered by activity.
+
+    `indices` holds the heap slot of every variable (-1 when absent) so
+    that a bumped variable can be moved in O(log n) instead of rescanning
+    every score.
+    """
+
+    __slots__ = ("activity", "heap", "indices")
+
+    def __init__(self, activity):
+        self.activity = activity
+        self.heap = []
+        self.indices = [-1]
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, var):
+        return self.indices[var] >= 0
+
+    def grow(self, num_vars):
+        self.indices.extend([-1] * (num_vars + 1 - len(self.indices)))
+
+    def rebuild(self):
+        """Re-heapify in O(n) after many activities changed at once."""
+        for i in range(len(self.heap) // 2 - 1, -1, -1):
+            self._sift_down(i)
+
+    def insert(self, var):
+        if self.indices[var] >= 0:
+            return
+        self.indices[var] = len(self.heap)
+        self.heap.append(var)
+        self._sift_up(len(self.heap) - 1)
+
+    def update(self, var):
+        """Restore heap order after the activity of `var` changed."""
+        i = self.indices[var]
+        if i < 0:
+            return
+        self._sift_up(i)
+        self._sift_down(self.indices[var])
+
+    def pop(self):
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.indices[top] = -1
+        if heap:
+            heap[0] = last
+            self.indices[last] = 0
+            self._sift_down(0)
+        return top
+
+    def _sift_up(self, i):
+        heap, indices, activity = self.heap, self.indices, self.activity
+        var = heap[i]
+        score = activity[var]
+        while i > 0:
+            parent = (i - 1) >> 1
+            parent_var = heap[parent]
+            if activity[parent_var] >= score:
+                break
+            heap[i] = parent_var
+            indices[parent_var] = i
+            i = parent
+        heap[i] = var
+        indices[var] = i
+
+    def _sift_down(self, i):
+        heap, indices, activity = self.heap, self.indices, self.activity
+        var = heap[i]
+        score = activity[var]
+        size = len(heap)
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            right = child + 1
+            if right < size and activity[heap[right]] > activity[heap[child]]:
+                child = right
+            child_var = heap[child]
+            if activity[child_var] <= score:
+                break
+            heap[i] = child_var
+            indices[child_var] = i
+            i = child
+        heap[i] = var
+        indices[var] = i
+
+
+def luby(i):
+    """i-th term (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ..."""
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
+class LubyRestarts:
+    """Restart after `unit` times the next Luby number of conflicts."""
+
+    __slots__ = ("unit", "index", "conflicts", "limit")
+
+    def __init__(self, unit=100):
+        self.unit = unit
+        self.index = 1
+        self.conflicts = 0
+        self.limit = unit
+
+    def on_conflict(self, lbd):
+        self.conflicts += 1
+
+    def should_restart(self):
+        return self.conflicts >= self.limit
+
+    def on_restart(self):
+        self.index += 1
+        self.conflicts = 0
+        self.limit = self.unit * luby(self.index)
+
+
+class GlucoseRestarts:
+    """Restart when recent learned clauses are worse than usual.
+
+    Compares a fast and a slow moving average of learned clause LBD and
+    restarts once the fast one exceeds the slow one by `margin`.
+    """
+
+    __slots__ = ("fast_window", "slow_window", "margin", "min_conflicts",
+                 "fast", "slow", "total", "conflicts")
+
+    def __init__(self, fast_window=32, slow_window=16384, margin=1.25, min_conflicts=50):
+        self.fast_window = fast_window
+        self.slow_window = slow_window
+        self.margin = margin
+        self.min_conflicts = min_conflicts
+        self.fast = 0.0
+        self.slow = 0.0
+        self.total = 0
+        self.conflicts = 0
+
+    def on_conflict(self, lbd):
+        # Plain averages until a window fills up, exponential after that
+        self.total += 1
+        self.conflicts += 1
+        self.fast += (lbd - self.fast) / min(self.total, self.fast_window)
+        self.slow += (lbd - self.slow) / min(self.total, self.slow_window)
+
+    def should_restart(self):
+        return self.conflicts >= self.min_conflicts and self.fast > self.margin * self.slow
+
+    def on_restart(self):
+        self.conflicts = 0
+
+
+RESTART_POLICIES = {
+    "luby": LubyRestarts,
+    "glucose": GlucoseRestarts,
+}
+
+
+class SolverStats:
+    """Search counters, kept up to date by the solver.
+
+    Counting costs a few integer additions per decision and conflict.
+    `times` (seconds per phase: propagate, analyze, decide, backtrack) is
+    only filled in when the solver was created with profile=True.
+    """
+
+    __slots__ = ("decisions", "propagations", "conflicts", "restarts", "rephases", "learned",
+                 "learned_literals", "size_histogram", "lbd_histogram", "solve_time", "times")
+
+    def __init__(self):
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+        self.restarts = 0
+        self.rephases = 0
+        self.learned = 0
+        self.learned_literals = 0
+        self.size_histogram = Counter()
+        self.lbd_histogram = Counter()
+        self.solve_time = 0.0
+        self.times = {}
+
+    def on_learned(self, size, lbd):
+        self.learned += 1
+        self.learned_literals += size
+        self.size_histogram[size] += 1
+        self.lbd_histogram[lbd] += 1
+
+    def timed(self, method, phase):
+        """Wrap `method` so that its run time adds up in times[phase]."""
+        times = self.times
+        times.setdefault(phase, 0.0)
+        clock = time.perf_counter
+
+        def wrapper(*args):
+            start = clock()
+            try:
+                return method(*args)
+            finally:
+                times[phase] += clock() - start
+        return wrapper
+
+    def as_dict(self):
+        elapsed = self.solve_time or float("inf")
+        return {
+            "decisions": self.decisions,
+            "propagations": self.propagations,
+            "conflicts": self.conflicts,
+            "restarts": self.restarts,
+            "rephases": self.rephases,
+            "learned": self.learned,
+            "average_learned_size": self.learned_literals / self.learned if self.learned else 0.0,
+            "learned_sizes": {str(k): v for k, v in sorted(self.size_histogram.items())},
+            "lbd_histogram": {str(k): v for k, v in sorted(self.lbd_histogram.items())},
+            "solve_time": self.solve_time,
+            "conflicts_per_second": self.conflicts / elapsed,
+            "propagations_per_second": self.propagations / elapsed,
+            "times": dict(self.times),
+        }
+
+    def to_json(self, **kwargs):
+        """Machine-readable summary (keyword arguments go to json.dumps)."""
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+# The third answer of solve(): a budget ran out or the solve was interrupted
+UNKNOWN = None
+
+
+def memory_usage():
+    """Resident memory of this process in bytes.
+
+    Read from /proc where there is one; elsewhere the peak RSS stands in,
+    which can only overestimate.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, kilobytes on Linux
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Clause arena layout: every clause is stored in CDCLSolver.arena as
+#   [size, flags, lbd, lit_1, ..., lit_size]
+# and is referred to by the offset of its first header word (a "cref").
+HEADER_SIZE = 3
+LEARNED = 1
+DELETED = 2
+VIVIFIED = 4
+
+
 class CDCLSolver:
-    def __init__(self, debug=True):
-        print("Initializing solver...")
+    def __init__(self, debug=False, reduce_interval=2000, reduce_increment=300,
+                 glue_lbd=2, max_learned=None, max_learned_bytes=None,
+                 restart_policy="glucose", var_decay=0.95, initial_phase=True,
+                 seed=None, random_var_freq=0.0, preprocess=False, inprocess=True,
+                 profile=False, rephase_flips=0, proof=None):
+        if debug:
+            print("Initializing solver...")
         # Core solver state
+        self.arena = array("i")
         self.clauses = []          
         self.learned_clauses = []  
-        self.assignments = {}      
+        self.wasted = 0
         self.level = 0            
-        self.decision_levels = {}  
-        self.implications = {}    
         self.debug = debug
+        # False once the clauses alone are unsatisfiable
+        self.ok = True
+        # Failing assumptions of the last UNSAT answer
+        self.core = []
+        self.stats = SolverStats()
+        # on_progress(stats) is called every `progress_interval` conflicts
+        self.on_progress = None
+        self.progress_interval = 1000
+
+        # Restart strategy: a name from RESTART_POLICIES, a policy object, or None
+        if isinstance(restart_policy, str):
+            restart_policy = RESTART_POLICIES[restart_policy]()
+        self.restart_policy = restart_policy
+
+        # Diversification: a seed perturbs initial scores, and initial_phase
+        # may be True, False or "random"
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.initial_phase = initial_phase
+        self.random_var_freq = random_var_freq
+
+        # Clause exchange hooks (used by the portfolio): on_learned(clause) is
+        # called for every learned clause, import_clauses() at each restart
+        self.on_learned = None
+        self.import_clauses = None
+
+        # Preprocessing runs once, before the first solve, when enabled.
+        # Eliminated variables map to their removed clauses (for models)
+        self.preprocess = preprocess
+        self.simplified = False
+        self.eliminated = {}
+
+        # Inprocessing (probing and vivification) every few restarts. Each
+        # pass has a propagation budget, and together they may take at most
+        # `inprocess_time_share` of the time since the previous run
+        self.inprocess = inprocess
+        self.inprocess_interval = 8
+        self.inprocess_time_share = 0.1
+        self.probe_limit = 100
+        self.probe_budget = 50000
+        self.vivify_budget = 50000
+        self.last_inprocess = None
+
+        # Local search rephasing at restarts 1, 2, 4, 8, ...: up to
+        # `rephase_flips` ProbSAT flips from the saved phases, whose best
+        # assignment becomes the new saved phases (0 disables it)
+        self.rephase_flips = rephase_flips
+        self.next_rephase = 1
+        self.local_search = None
+        self.local_search_key = None
+
+        # DRAT proof: a DratWriter, or a path or binary file to write one to
+        if proof is not None and not isinstance(proof, DratWriter):
+            proof = DratWriter(proof)
+        self.proof = proof
+
+        # Budgets of the running solve (see solve) and the interrupt flag,
+        # which other threads may set through interrupt()
+        self.budgeted = False
+        self.conflict_limit = None
+        self.propagation_limit = None
+        self.deadline = None
+        self.memory_limit = None
+        self.budget_checks = 0
+        self.interrupt_requested = threading.Event()
+
+        # Native at-most-k and XOR constraints (see constraints.py), with
+        # literal-indexed watch lists of constraint indices. Gauss-Jordan
+        # elimination runs over the XORs before the search and, with
+        # gauss_at_restarts, again at restarts after new level-0 facts.
+        # Slots of constraints that elimination replaced are reused
+        self.constraints = []
+        self.free_cids = []
+        self.native_watches = [[]]
+        self.has_xors = False
+        self.xors_changed = False
+        self.gauss_at_restarts = True
+        self.gauss_limit = 5000
+        self.gauss_trail = 0
+        self.gauss_derived = set()
+
+        # Checkpoints (see checkpoint.py): with checkpoint_path set, the state
+        # is saved there at the first restart after every checkpoint_interval
+        # seconds. checkpoint_info is saved along with it for the caller
+        self.checkpoint_path = None
+        self.checkpoint_interval = 600.0
+        self.last_checkpoint = time.perf_counter()
+        self.checkpoint_info = {}
+
+        # Model enumeration: variables decided before all others, and the
+        # decisions behind the last model (see iter_models)
+        self.priority = None
+        self.priority_heads = []
+        self.model_decisions = []
+
+        # Per-variable arrays indexed by variable number (slot 0 unused)
+        self.num_vars = 0
+        self.capacity = 0
+        self.decision_levels = [0]
+        self.implications = [None]
+        self.seen = [False]
         
         # VSIDS scoring
-        self.variable_activity = {} 
+        self.variable_activity = [0.0]
         self.var_inc = 1.0       
-        self.var_decay = 0.95       
+        self.var_decay = var_decay
+        self.order_heap = VarOrderHeap(self.variable_activity)
         
         # Phase saving
-        self.saved_phases = {}      
+        self.saved_phases = [True]
+
+        # Literal-indexed arrays of length 2 * capacity + 1: literal v lives
+        # at index v and -v at index -v (Python's negative indexing), so
+        # assignments[lit] is the truth value of lit and assignments[var]
+        # the value of var.
+        self.assignments = [None]
+
+        # Watched literals: literal -> flat [cref, blocker, cref, blocker, ...]
+        # where the blocker is another literal of the clause; a true blocker
+        # lets propagation skip the clause without touching the arena
+        self.watches = [[]]
+
+        # Assignment trail and the trail index where each level starts
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+
+        # Learned clause database (LBD lives in the clause header)
+        self.clause_activity = {}
+        self.cla_inc = 1.0
+        self.cla_decay = 0.999
+        self.learned_bytes = 0
+        self.glue_lbd = glue_lbd
+        self.reduce_interval = reduce_interval
+        self.reduce_increment = reduce_increment
+        self.next_reduce = reduce_interval
+        self.max_learned = max_learned
+        self.max_learned_bytes = max_learned_bytes
+        # When a ceiling-triggered reduction frees nothing (every learned
+        # clause is a unit or locked), the ceiling is only checked again this
+        # many conflicts later
+        self.capacity_backoff = 100
+        self.next_capacity_check = 0
+
+        # Per-phase timers wrap the methods on this instance only, so that
+        # solvers without them do not pay for a check
+        if profile:
+            for name, phase in (("_unit_propagation", "propagate"), ("_analyze_conflict", "analyze"),
+                                ("_find_unassigned_var", "decide"), ("_backtrack", "backtrack")):
+                setattr(self, name, self.stats.timed(getattr(self, name), phase))
+
+    @property
+    def conflicts(self):
+        return self.stats.conflicts
+
+    @property
+    def restarts(self):
+        return self.stats.restarts
         
     def log(self, message):
         if self.debug:
             print(f"DEBUG: {message}")
             
     def add_clause(self, clause):
-        print(f"Adding clause: {clause}")
-        self.clauses.append(clause)
-        self.log(f"Added clause: {clause}")
+        if self.debug:
+            print(f"Adding clause: {clause}")
+        # Duplicate literals would break the two-watch invariant
+        clause = list(dict.fromkeys(clause))
+        for lit in clause:
+            if abs(lit) > self.num_vars:
+                self._grow(abs(lit))
+        self._add_clause(clause)
+        if self.debug:
+            self.log(f"Added clause: {clause}")
         
         # Initializng VSIDS scores for variables in clause
         for lit in clause:
-            var = abs(lit)
-            if var not in self.variable_activity:
-                self.variable_activity[var] = 0.0
+            self._bump_variable_activity(abs(lit))
+
+    def add_clauses_flat(self, literals):
+        """Add zero-terminated clauses from a flat list or array of literals.
+
+        This is the bulk path used by the DIMACS loader: nothing is printed,
+        literals go straight into the arena, and initial VSIDS scores are
+        counted in one pass with the decision heap rebuilt once at the end.
+        """
+        if not literals:
+            return
+        top = max(max(literals), -min(literals))
+        if top > self.num_vars:
+            self._grow(top)
+        if self.eliminated:
+            self._restore_literals(literals)
+            
+        arena = self.arena
+        clauses = self.clauses
+        watches = self.watches
+        find_zero = literals.index
+        start = 0
+        end = len(literals)
+        while start < end:
+            try:
+                stop = find_zero(0, start)
+            except ValueError:
+                # Last clause without a terminating zero
+                stop = end
+            size = stop - start
+            # Units, duplicate literals and an already propagated level 0
+            # need the careful path
+            if size < 2 or self.qhead or len(set(literals[start:stop])) != size:
+                self._add_clause(list(dict.fromkeys(literals[start:stop])))
+            else:
+                cref = len(arena)
+                arena.extend((size, 0, 0))
+                arena.extend(literals[start:stop])
+                first = literals[start]
+                second = literals[start + 1]
+                watches[first].extend((cref, second))
+                watches[second].extend((cref, first))
+                clauses.append(cref)
+            start = stop + 1
+                
+        # Same initial scores as add_clause: one bump per occurrence
+        activity = self.variable_activity
+        for var, count in Counter(map(abs, literals)).items():
+            if var:
+                activity[var] += count * self.var_inc
+        self.order_heap.rebuild()
+
+    def add_atmost(self, lits, k):
+        """Require that at most `k` of `lits` are true.
+
+        The constraint is propagated natively instead of being expanded
+        into clauses (see constraints.py).
+        """
+        lits = list(dict.fromkeys(lits))
+        # A literal and its negation always contribute exactly one true
+        present = set(lits)
+        pairs = {abs(lit) for lit in lits if -lit in present}
+        if pairs:
+            lits = [lit for lit in lits if abs(lit) not in pairs]
+            k -= len(pairs)
+        if k >= len(lits):
+            return
+        if k < 0:
+            self.ok = False
+            return
+        if k == 0:
+            for lit in lits:
+                self.add_clause([-lit])
+        elif k == len(lits) - 1:
+            self.add_clause([-lit for lit in lits])
+        else:
+            self._add_constraint(AtMost(lits, k))
+
+    def add_xor(self, vars, parity):
+        """Require that `vars` sum to `parity` (0/1 or a bool) modulo 2.
+
+        A negative literal in `vars` stands for its variable with the
+        parity flipped. The constraint is propagated natively, and XOR
+        constraints go through Gauss-Jordan elimination before the search.
+        """
+        parity = int(bool(parity))
+        odd = Counter()
+        for lit in vars:
+            if lit < 0:
+                parity ^= 1
+            odd[abs(lit)] ^= 1
+        # x + x = 0: repeated variables cancel out
+        variables = [var for var, count in odd.items() if count]
+        if not variables:
+            if parity:
+                self.ok = False
+            return
+        if len(variables) == 1:
+            self.add_clause([variables[0] if parity else -variables[0]])
+            return
+        self.has_xors = True
+        self.xors_changed = True
+        self._add_constraint(Xor(variables, parity))
+
+    def _add_constraint(self, constraint):
+        if self.proof is not None:
+            raise ValueError("DRAT proofs do not cover native constraints")
+        variables = constraint.variables()
+        top = max(variables)
+        if top > self.num_vars:
+            self._grow(top)
+        if self.eliminated:
+            self._restore_literals(variables)
+        if self.free_cids:
+            cid = self.free_cids.pop()
+            self.constraints[cid] = constraint
+        else:
+            cid = len(self.constraints)
+            self.constraints.append(constraint)
+        if not constraint.attach(self, cid):
+            self.ok = False
+        for var in variables:
             self._bump_variable_activity(var)
+
+    def _add_clause(self, clause):
+        """Store a duplicate-free clause and watch it.
+
+        Between solves the solver sits at level 0 with those assignments
+        already propagated, so open literals are moved to the front to be
+        watched, and a clause left unit (or empty) is handled right away.
+        """
+        if self.eliminated:
+            self._restore_literals(clause)
+        assignments = self.assignments
+        if self.qhead:
+            clause.sort(key=lambda lit: assignments[lit] is False)
+        cref = self._alloc_clause(clause)
+        self.clauses.append(cref)
+        size = len(clause)
+        if size == 0:
+            self.ok = False
+        elif size == 1 or self.qhead:
+            first = clause[0]
+            if assignments[first] is False:
+                self.ok = False
+            elif assignments[first] is None and (size == 1 or assignments[clause[1]] is False):
+                self._enqueue(first, cref)
+        if size >= 2:
+            self._attach_clause(cref)
+        return cref
+
+    def iter_clauses(self, learned=False):
+        """Yield the original (or learned) clauses as lists of literals."""
+        arena = self.arena
+        for cref in (self.learned_clauses if learned else self.clauses):
+            start = cref + HEADER_SIZE
+            yield arena[start:start + arena[cref]].tolist()
+
+    def simplify(self, frozen=(), **options):
+        """Preprocess the original clauses in place (see preprocess.py).
+
+        Variables in `frozen` are kept; any other variable may be
+        eliminated and comes back automatically if a later clause or
+        assumption uses it. Returns False if the clauses turn out UNSAT.
+        `options` go to the Preprocessor.
+        """
+        self.simplified = True
+        self._backtrack(0)
+        if not self.ok:
+            return False
+        success, _ = self._unit_propagation()
+        if not success:
+            self.ok = False
+            return False
+
+        frozen = {abs(lit) for lit in frozen}
+        # Variables of native constraints must survive elimination
+        for constraint in self.constraints:
+            if constraint is not None:
+                frozen.update(constraint.variables())
+        preprocessor = Preprocessor(frozen=frozen, proof=self.proof, **options)
+        clauses = preprocessor.simplify(self.iter_clauses(), self.trail)
+        if clauses is None:
+            self.ok = False
+            return False
+        self.log(f"Preprocessing: {len(self.clauses)} clauses -> {len(clauses)}, "
+                 f"{len(preprocessor.eliminated)} variables eliminated")
+
+        # Level-0 facts no longer need their reason clauses
+        implications = self.implications
+        for lit in self.trail:
+            implications[abs(lit)] = None
+        eliminated = preprocessor.eliminated
+        stale = [cref for cref in self.learned_clauses
+                 if any(abs(lit) in eliminated for lit in self._clause_literals(cref))]
+        if stale:
+            if self.proof is not None:
+                for cref in stale:
+                    self.proof.delete(self._clause_literals(cref))
+            stale_set = set(stale)
+            self.learned_clauses = [c for c in self.learned_clauses if c not in stale_set]
+            self.learned_bytes -= sum(self._clause_bytes(c) for c in stale)
+        self._remove_clauses(self.clauses + stale)
+        self.clauses = []
+
+        assignments = self.assignments
+        for lit in preprocessor.units:
+            if assignments[lit] is None:
+                self._add_clause([lit])
+        for clause in clauses:
+            self._add_clause(clause)
+        self.eliminated.update(eliminated)
+        self._compact_arena()
+        return True
+
+    def _restore_literals(self, literals):
+        """Bring back eliminated variables before they are used again."""
+        eliminated = self.eliminated
+        for var in [var for var in {abs(lit) for lit in literals} if var in eliminated]:
+            if var in eliminated:
+                clauses = eliminated.pop(var)
+                self.order_heap.insert(var)
+                for clause in clauses:
+                    self._add_clause(list(clause))
+
+    def _grow(self, num_vars):
+        extra = num_vars - self.num_vars
+        if num_vars > self.capacity:
+            self._grow_literal_arrays(max(num_vars, 2 * self.capacity))
+        self.decision_levels.extend([0] * extra)
+        self.implications.extend([None] * extra)
+        self.seen.extend([False] * extra)
+        if self.seed is None:
+            self.variable_activity.extend([0.0] * extra)
+        else:
+            self.variable_activity.extend(self.rng.random() * 1e-5 for _ in range(extra))
+        if self.initial_phase == "random":
+            self.saved_phases.extend(self.rng.random() < 0.5 for _ in range(extra))
+        else:
+            self.saved_phases.extend([bool(self.initial_phase)] * extra)
+        self.order_heap.grow(num_vars)
+        for var in range(self.num_vars + 1, num_vars + 1):
+            self.order_heap.insert(var)
+        self.num_vars = num_vars
+
+    def _grow_literal_arrays(self, capacity):
+        # Positive literals keep their slots; negative ones move to the new end
+        old = self.capacity
+        pad = 2 * (capacity - old)
+        for name, fill in (("assignments", None), ("watches", None), ("native_watches", None)):
+            values = getattr(self, name)
+            grown = values[:old + 1] + [fill] * pad + values[old + 1:]
+            setattr(self, name, grown)
+        watches = self.watches
+        native_watches = self.native_watches
+        for lit in range(old + 1, capacity + 1):
+            watches[lit] = []
+            watches[-lit] = []
+            native_watches[lit] = []
+            native_watches[-lit] = []
+        self.capacity = capacity
             
     def _bump_variable_activity(self, var):
-        if var not in self.variable_activity:
-            self.variable_activity[var] = 0.0
         self.variable_activity[var] += self.var_inc
+        self.order_heap.update(var)
         
-        # Rescaling if activity gets too large
+        # Rescaling if activity gets too large (heap order is unchanged)
         if self.variable_activity[var] > 1e100:
-            for v in self.variable_activity:
-                self.variable_activity[v] *= 1e-100
+            activity = self.variable_activity
+            for v in range(1, self.num_vars + 1):
+                activity[v] *= 1e-100
             self.var_inc *= 1e-100
             
     def _decay_variables(self):
         self.var_inc *= (1.0 / self.var_decay)
+
+    def _alloc_clause(self, clause, learned=False, lbd=0):
+        cref = len(self.arena)
+        self.arena.extend((len(clause), LEARNED if learned else 0, lbd))
+        self.arena.extend(clause)
+        return cref
+
+    def _clause_literals(self, cref):
+        start = cref + HEADER_SIZE
+        return self.arena[start:start + self.arena[cref]]
             
-    def _find_unit_clause(self):
-        for clause in self.clauses + self.learned_clauses:
-            unassigned = []
-            is_satisfied = False
-            
-            for lit in clause:
-                var = abs(lit)
-                if var in self.assignments:
-                    if (lit > 0) == self.assignments[var]:
-                        is_satisfied = True
+    def _attach_clause(self, cref):
+        arena = self.arena
+        if arena[cref] >= 2:
+            first = arena[cref + HEADER_SIZE]
+            second = arena[cref + HEADER_SIZE + 1]
+            self.watches[first].extend((cref, second))
+            self.watches[second].extend((cref, first))
+
+    def _enqueue(self, lit, reason=None):
+        var = abs(lit)
+        self.assignments[lit] = True
+        self.assignments[-lit] = False
+        self.decision_levels[var] = self.level
+        self.implications[var] = reason
+        self.trail.append(lit)
+
+    def _unit_propagation(self):
+        """Propagate every literal on the trail past qhead.
+
+        Each clause watches its first two literals; only the clauses
+        watching a literal that just became false are visited.
+        """
+        arena = self.arena
+        assignments = self.assignments
+        levels = self.decision_levels
+        implications = self.implications
+        watches = self.watches
+        trail = self.trail
+        level = self.level
+        start = self.qhead
+        native_watches = self.native_watches if self.constraints else None
+
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            watch_list = watches[false_lit]
+            i = j = 0
+            n = len(watch_list)
+
+            while i < n:
+                cref = watch_list[i]
+                blocker = watch_list[i + 1]
+                i += 2
+                
+                if assignments[blocker] is True:
+                    watch_list[j] = cref
+                    watch_list[j + 1] = blocker
+                    j += 2
+                    continue
+                base = cref + HEADER_SIZE
+
+                # Keeping the false literal in the second slot
+                first = arena[base]
+                if first == false_lit:
+                    first = arena[base + 1]
+                    arena[base] = first
+                    arena[base + 1] = false_lit
+                value = assignments[first]
+                if value is True:
+                    watch_list[j] = cref
+                    watch_list[j + 1] = first
+                    j += 2
+                    continue
+
+                # Looking for a replacement watch
+                for k in range(base + 2, base + arena[cref]):
+                    lit = arena[k]
+                    if assignments[lit] is not False:
+                        arena[base + 1] = lit
+                        arena[k] = false_lit
+                        watches[lit].extend((cref, first))
                         break
                 else:
-                    unassigned.append(lit)
-            
-            if not is_satisfied and len(unassigned) == 1:
-                return unassigned[0], clause
-                
-        return None, None
+                    watch_list[j] = cref
+                    watch_list[j + 1] = first
+                    j += 2
+                    if value is None:
+                        var = abs(first)
+                        assignments[first] = True
+                        assignments[-first] = False
+                        levels[var] = level
+                        implications[var] = cref
+                        trail.append(first)
+                        if self.debug:
+                            self.log(f"Unit propagation: set {var} to {first > 0} at level {level}")
+                        continue
+
+                    # Every literal is false: conflict
+                    while i < n:
+                        watch_list[j] = watch_list[i]
+                        j += 1
+                        i += 1
+                    del watch_list[j:]
+                    self.stats.propagations += self.qhead - start
+                    self.qhead = len(trail)
+                    return False, cref
+
+            del watch_list[j:]
+
+            if native_watches is not None and native_watches[-false_lit]:
+                conflict = self._propagate_native(-false_lit)
+                if conflict is not None:
+                    self.stats.propagations += self.qhead - start
+                    self.qhead = len(trail)
+                    return False, conflict
+
+        self.stats.propagations += self.qhead - start
+        return True, None
             
-    def _unit_propagation(self):
+    def _propagate_native(self, lit):
+        """Run the native constraints watching `lit`, which just became true.
+
+        Returns the (negative) reason marker of a violated constraint, or
+        None.
+        """
+        constraints = self.constraints
+        watching = self.native_watches[lit]
+        kept = []
+        for k, cid in enumerate(watching):
+            result = constraints[cid].propagate(self, lit, cid)
+            if result == MOVED:
+                continue
+            kept.append(cid)
+            if result == CONFLICT:
+                kept.extend(watching[k + 1:])
+                self.native_watches[lit] = kept
+                return -cid - 1
+        self.native_watches[lit] = kept
+        return None
+
+    def _native_reason(self, var, marker):
+        # Reason clause of a natively implied variable, built on demand
+        lit = var if self.assignments[var] else -var
+        return self.constraints[-marker - 1].reason(self.assignments, lit)
+
+    def _analyze_conflict(self, conflict_clause):
+        """First-UIP conflict analysis.
+
+        Walks the trail backwards from the conflict, resolving away
+        current-level literals in reverse assignment order until a single
+        one (the UIP) is left. The learned clause is returned with the
+        asserting literal first and a literal of the backjump level second.
+        """
+        if self.debug:
+            self.log(f"Analyzing conflict from clause: {conflict_clause}")
+        
+        arena = self.arena
+        seen = self.seen
+        levels = self.decision_levels
+        implications = self.implications
+        trail = self.trail
+        learned_clause = [0]
+        pending = 0
+        index = len(trail) - 1
+        cref = conflict_clause
+        pivot = 0
+        
         while True:
-            unit_lit, reason = self._find_unit_clause()
-            if unit_lit is None:
+            if cref >= 0:
+                if arena[cref + 1] & LEARNED:
+                    self._bump_clause_activity(cref)
+                start = cref + HEADER_SIZE
+                reason = arena[start:start + arena[cref]]
+            else:
+                # Native constraint: pivot 0 asks for the conflict clause
+                reason = self.constraints[-cref - 1].reason(self.assignments, pivot)
+            for lit in reason:
+                var = abs(lit)
+                if lit == pivot or seen[var] or levels[var] == 0:
+                    continue
+                seen[var] = True
+                self._bump_variable_activity(var)
+                if levels[var] == self.level:
+                    pending += 1
+                else:
+                    learned_clause.append(lit)
+                    
+            # Pick latest assigned variable still marked
+            while not seen[abs(trail[index])]:
+                index -= 1
+            pivot = trail[index]
+            index -= 1
+            seen[abs(pivot)] = False
+            pending -= 1
+            if pending == 0:
                 break
-                
-            var = abs(unit_lit)
-            value = unit_lit > 0
+            cref = implications[abs(pivot)]
             
-            # Checking for conflict
-            if var in self.assignments:
-                if self.assignments[var] != value:
-                    return False, reason
-                continue
+        learned_clause[0] = -pivot
+        self._minimize_clause(learned_clause)
+        
+        # Moving a literal of the backjump level into the second watch
+        if len(learned_clause) > 1:
+            deepest = max(range(1, len(learned_clause)), key=lambda i: levels[abs(learned_clause[i])])
+            learned_clause[1], learned_clause[deepest] = learned_clause[deepest], learned_clause[1]
             
-            # Making assignment
-            self.assignments[var] = value
-            self.decision_levels[var] = self.level
-            self.implications[var] = reason
-            self.saved_phases[var] = value  
-            self.log(f"Unit propagation: set {var} to {value} at level {self.level}")
+        if self.debug:
+            self.log(f"Learned clause: {learned_clause}")
+        return learned_clause
+        
+    def _minimize_clause(self, learned_clause):
+        """Recursive minimization: drop literals implied by the others."""
+        seen = self.seen
+        levels = self.decision_levels
+        implications = self.implications
+        
+        # Cheap filter on which levels a removable literal may depend on
+        abstract_levels = 0
+        for lit in learned_clause[1:]:
+            abstract_levels |= 1 << (levels[abs(lit)] & 31)
             
-        return True, None
+        to_clear = learned_clause[1:]
+        j = 1
+        for i in range(1, len(learned_clause)):
+            lit = learned_clause[i]
+            if implications[abs(lit)] is None or not self._lit_redundant(lit, abstract_levels, to_clear):
+                learned_clause[j] = lit
+                j += 1
+        del learned_clause[j:]
+        
+        for lit in to_clear:
+            seen[abs(lit)] = False
             
-    def _analyze_conflict(self, conflict_clause):
-        self.log(f"Analyzing conflict from clause: {conflict_clause}")
+    def _lit_redundant(self, lit, abstract_levels, to_clear):
+        arena = self.arena
+        seen = self.seen
+        levels = self.decision_levels
+        implications = self.implications
+        stack = [lit]
+        top = len(to_clear)
+        
+        while stack:
+            var = abs(stack.pop())
+            cref = implications[var]
+            if cref >= 0:
+                start = cref + HEADER_SIZE
+                reason = arena[start:start + arena[cref]]
+            else:
+                reason = self._native_reason(var, cref)
+            for reason_lit in reason:
+                reason_var = abs(reason_lit)
+                if reason_var == var or seen[reason_var] or levels[reason_var] == 0:
+                    continue
+                if implications[reason_var] is not None and (1 << (levels[reason_var] & 31)) & abstract_levels:
+                    seen[reason_var] = True
+                    stack.append(reason_lit)
+                    to_clear.append(reason_lit)
+                else:
+                    # Reached a decision or a foreign level: undo this attempt
+                    for undo_lit in to_clear[top:]:
+                        seen[abs(undo_lit)] = False
+                    del to_clear[top:]
+                    return False
+                    
+        return True
+            
+    def _bump_clause_activity(self, cref):
+        activity = self.clause_activity
+        activity[cref] += self.cla_inc
+        if activity[cref] > 1e20:
+            for other in activity:
+                activity[other] *= 1e-20
+            self.cla_inc *= 1e-20
+            
+    def _compute_lbd(self, clause):
+        """Literal block distance: number of distinct decision levels."""
+        levels = self.decision_levels
+        return len({levels[abs(lit)] for lit in clause})
         
-        # Tracking variables from current decision level
-        current_level_vars = set()
-        other_level_lits = []
+    def _clause_bytes(self, cref):
+        # Arena footprint: header and literals, four bytes per word
+        return 4 * (HEADER_SIZE + self.arena[cref])
         
-        # Initializing from conflict clause
-        for lit in conflict_clause:
-            var = abs(lit)
-            if self.decision_levels[var] == self.level:
-                current_level_vars.add(var)
-                self._bump_variable_activity(var)  
+    def _add_learned_clause(self, clause):
+        lbd = self._compute_lbd(clause)
+        cref = self._alloc_clause(clause, learned=True, lbd=lbd)
+        self.learned_clauses.append(cref)
+        self.clause_activity[cref] = self.cla_inc
+        self.learned_bytes += self._clause_bytes(cref)
+        return cref, lbd
+        
+    def _over_capacity(self, count=None):
+        # `count` stands in for len(learned_clauses) while it is being cut
+        if count is None:
+            count = len(self.learned_clauses)
+        if self.max_learned is not None and count > self.max_learned:
+            return True
+        if self.max_learned_bytes is not None and self.learned_bytes > self.max_learned_bytes:
+            return True
+        return False
+        
+    def _is_locked(self, cref):
+        # A clause that is the reason of a current assignment must stay
+        return self.implications[abs(self.arena[cref + HEADER_SIZE])] == cref
+        
+    def _reduce_db(self):
+        """Delete the less useful half of the learned clauses.
+
+        Clauses with LBD at most `glue_lbd` are kept permanently, unless
+        the memory ceiling can only be honoured by dropping them too.
+        Returns the number of clauses removed.
+        """
+        arena = self.arena
+        activity = self.clause_activity
+        keep = []
+        candidates = []
+        for cref in self.learned_clauses:
+            if arena[cref + 2] <= self.glue_lbd or arena[cref] <= 2 or self._is_locked(cref):
+                keep.append(cref)
             else:
-                other_level_lits.append(lit)
+                candidates.append(cref)
                 
-  
-        while len(current_level_vars) > 1:
-            # Pick latest assigned variable
-            var = max(current_level_vars, key=lambda v: self.decision_levels[v])
-            current_level_vars.remove(var)
-            
-            if var in self.implications:
-                antecedent = self.implications[var]
-                for lit in antecedent:
-                    var_ant = abs(lit)
-                    if var_ant != var:
-                        if self.decision_levels[var_ant] == self.level:
-                            current_level_vars.add(var_ant)
-                            self._bump_variable_activity(var_ant)
-                        else:
-                            other_level_lits.append(lit)
-        
-      
-        if current_level_vars:
-            var = current_level_vars.pop()
-            learned_lit = -var if self.assignments[var] else var
-            learned_clause = other_level_lits + [learned_lit]
+        # Worst first: high LBD, then low activity
+        candidates.sort(key=lambda c: (-arena[c + 2], activity[c]))
+        half = len(candidates) // 2
+        removed = candidates[:half]
+        keep.extend(candidates[half:])
+        
+        # Enforcing the ceiling, this time without sparing glue clauses
+        self.learned_clauses = keep
+        self.learned_bytes = sum(self._clause_bytes(c) for c in keep)
+        if self._over_capacity():
+            keep.sort(key=lambda c: (-arena[c + 2], activity[c]))
+            live = len(keep)
+            i = 0
+            while self._over_capacity(live) and i < len(keep):
+                cref = keep[i]
+                i += 1
+                if arena[cref] > 1 and not self._is_locked(cref):
+                    removed.append(cref)
+                    self.learned_bytes -= self._clause_bytes(cref)
+                    keep[i - 1] = None
+                    live -= 1
+            self.learned_clauses = [c for c in keep if c is not None]
             
-            self.log(f"Learned clause: {learned_clause}")
-            return learned_clause
+        if self.proof is not None:
+            for cref in removed:
+                self.proof.delete(self._clause_literals(cref))
+        self._remove_clauses(removed)
+        self.log(f"Reduced learned clauses: removed {len(removed)}, kept {len(self.learned_clauses)}")
+        
+        # Reclaiming arena space once enough of it belongs to dead clauses
+        if self.wasted > len(self.arena) // 5:
+            self._compact_arena()
+        return len(removed)
+        
+    def _remove_clauses(self, removed):
+        arena = self.arena
+        removed_set = set(removed)
+        for watch_list in self.watches:
+            if watch_list:
+                kept = []
+                for k in range(0, len(watch_list), 2):
+                    if watch_list[k] not in removed_set:
+                        kept.append(watch_list[k])
+                        kept.append(watch_list[k + 1])
+                watch_list[:] = kept
+        for cref in removed:
+            arena[cref + 1] |= DELETED
+            self.wasted += HEADER_SIZE + arena[cref]
+            self.clause_activity.pop(cref, None)
+            
+    def _compact_arena(self):
+        """Copy live clauses into a fresh arena and renumber every cref."""
+        old = self.arena
+        arena = array("i")
+        moved = {}
+        for crefs in (self.clauses, self.learned_clauses):
+            for i, cref in enumerate(crefs):
+                end = cref + HEADER_SIZE + old[cref]
+                moved[cref] = crefs[i] = len(arena)
+                arena.extend(old[cref:end])
+                
+        for watch_list in self.watches:
+            if watch_list:
+                watch_list[0::2] = [moved[c] for c in watch_list[0::2]]
+        implications = self.implications
+        for lit in self.trail:
+            var = abs(lit)
+            cref = implications[var]
+            if cref is not None and cref >= 0:
+                implications[var] = moved[cref]
+        self.clause_activity = {moved[c]: a for c, a in self.clause_activity.items()}
         
-        return other_level_lits
+        self.log(f"Compacted clause arena from {len(old)} to {len(arena)} words")
+        self.arena = arena
+        self.wasted = 0
             
     def _backtrack(self, level):
-        self.log(f"Backtracking to level {level}")
-        
-        for var in list(self.assignments.keys()):
-            if self.decision_levels[var] > level:
-                # Save phase before unassigning
-                self.saved_phases[var] = self.assignments[var]
-                del self.assignments[var]
-                del self.decision_levels[var]
-                if var in self.implications:
-                    del self.implications[var]
+        """Undo every assignment above `level`, newest first."""
+        if self.level <= level:
+            return
+        if self.debug:
+            self.log(f"Backtracking to level {level}")
+        
+        trail = self.trail
+        start = self.trail_lim[level]
+        assignments = self.assignments
+        saved_phases = self.saved_phases
+        implications = self.implications
+        order_heap = self.order_heap
+        for i in range(len(trail) - 1, start - 1, -1):
+            var = abs(trail[i])
+            # Save phase before unassigning
+            saved_phases[var] = assignments[var]
+            assignments[var] = None
+            assignments[-var] = None
+            implications[var] = None
+            # Lazily putting the variable back into the decision queue
+            order_heap.insert(var)
                     
+        del trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = start
         self.level = level
+        heads = self.priority_heads
+        while heads and heads[-1][0] >= level:
+            heads.pop()
             
     def _find_unassigned_var(self):
-        max_activity = -1
-        chosen_var = None
-        
-        for var in self.variable_activity:
-            if var not in self.assignments and self.variable_activity[var] > max_activity:
-                max_activity = self.variable_activity[var]
-                chosen_var = var
+        if self.priority is not None:
+            var = self._next_priority_var()
+            if var is not None:
+                return var
+        if self.random_var_freq and self.order_heap and self.rng.random() < self.random_var_freq:
+            var = self.order_heap.heap[self.rng.randrange(len(self.order_heap))]
+            if self.assignments[var] is None and var not in self.eliminated:
+                return var
                 
-        return chosen_var
+        # Assigned variables are skipped here rather than removed eagerly
+        while self.order_heap:
+            var = self.order_heap.pop()
+            if self.assignments[var] is None and var not in self.eliminated:
+                return var
+                
+        return None
+
+    def _next_priority_var(self):
+        """First unassigned variable of `priority`, in list order.
+
+        priority_heads holds (level, index) pairs: every priority variable
+        before index was assigned at that level or below, so the scan can
+        resume there until _backtrack drops the entry.
+        """
+        heads = self.priority_heads
+        level = self.level
+        head = heads[-1][1] if heads else 0
+        priority = self.priority
+        assignments = self.assignments
+        while head < len(priority) and assignments[priority[head]] is not None:
+            head += 1
+        if heads and heads[-1][0] == level:
+            heads[-1] = (level, head)
+        else:
+            heads.append((level, head))
+        return priority[head] if head < len(priority) else None
             
-    def solve(self):
-        """Main SAT solving function"""
+    def solve(self, assumptions=(), conflict_budget=None, propagation_budget=None,
+              time_budget=None, memory_budget=None):
+        """Main SAT solving function
+
+        Returns (True, model) or (False, {}). `assumptions` are literals that
+        must hold for this call only; after an UNSAT answer `self.core` lists
+        the assumptions that made it UNSAT (empty if the clauses alone are).
+        Learned clauses, VSIDS scores and saved phases carry over between
+        calls, and clauses can be added between them.
+
+        The budgets bound this call: conflicts, propagations, seconds and
+        bytes of process memory. When one runs out, or interrupt() is
+        called, the answer is (UNKNOWN, {}) and the solver stays usable.
+        """
+        start = time.perf_counter()
+        stats = self.stats
+        self.conflict_limit = None if conflict_budget is None else stats.conflicts + conflict_budget
+        self.propagation_limit = None if propagation_budget is None else stats.propagations + propagation_budget
+        self.deadline = None if time_budget is None else start + time_budget
+        self.memory_limit = memory_budget
+        self.budgeted = not (conflict_budget is None and propagation_budget is None
+                             and time_budget is None and memory_budget is None)
+        try:
+            result = self._solve(assumptions)
+            if self.proof is not None and not self.ok:
+                self.proof.add([])
+                self.proof.flush()
+            return result
+        finally:
+            self.budgeted = False
+            stats.solve_time += time.perf_counter() - start
+
+    def interrupt(self):
+        """Ask the running (or next) solve to stop and answer UNKNOWN.
+
+        Safe to call from any thread; the request is used up by the solve
+        that honours it.
+        """
+        self.interrupt_requested.set()
+
+    def _out_of_budget(self):
+        if self.interrupt_requested.is_set():
+            self.interrupt_requested.clear()
+            self.log("Interrupted - UNKNOWN")
+            return True
+        if not self.budgeted:
+            return False
+        stats = self.stats
+        if self.conflict_limit is not None and stats.conflicts >= self.conflict_limit:
+            self.log("Conflict budget exhausted - UNKNOWN")
+            return True
+        if self.propagation_limit is not None and stats.propagations >= self.propagation_limit:
+            self.log("Propagation budget exhausted - UNKNOWN")
+            return True
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.log("Time budget exhausted - UNKNOWN")
+            return True
+        # Reading the memory usage is a system call, so it is sampled
+        self.budget_checks += 1
+        if self.memory_limit is not None and self.budget_checks % 256 == 0 \
+                and memory_usage() >= self.memory_limit:
+            self.log("Memory budget exhausted - UNKNOWN")
+            return True
+        return False
+
+    def _solve(self, assumptions):
         self.log("Starting solve")
-        self.level = 0
-        self.assignments = {}
-        self.decision_levels = {}
-        self.implications = {}
+        if self.last_inprocess is None:
+            self.last_inprocess = time.perf_counter()
+        self.core = []
+        assumptions = list(assumptions)
+        top = max((abs(lit) for lit in assumptions), default=0)
+        if top > self.num_vars:
+            self._grow(top)
+        self._backtrack(0)
+        if self.eliminated:
+            self._restore_literals(assumptions)
+        if self.preprocess and not self.simplified:
+            self.simplify(frozen=assumptions + (self.priority or []))
+        if self.xors_changed and self.ok:
+            if self._unit_propagation()[0]:
+                self._gauss()
+            else:
+                self.ok = False
+        if not self.ok:
+            self.log("Clauses are unsatisfiable - UNSAT")
+            return False, {}
         
+        stats = self.stats
         while True:
             success, conflict_clause = self._unit_propagation()
             
             if not success:
                 if self.level == 0:
                     self.log("Conflict at level 0 - UNSAT")
+                    self.ok = False
                     return False, {}
                     
+                stats.conflicts += 1
                 learned_clause = self._analyze_conflict(conflict_clause)
-                self.learned_clauses.append(learned_clause)
+                if self.proof is not None:
+                    self.proof.add(learned_clause)
                 
                 # Finding backtrack level
                 if len(learned_clause) == 1:
                     backtrack_level = 0
                 else:
-                    levels = [self.decision_levels[abs(lit)] for lit in learned_clause]
-                    levels.remove(max(levels))
-                    backtrack_level = max(levels) if levels else 0
+                    backtrack_level = self.decision_levels[abs(learned_clause[1])]
+                    
+                # LBD is taken before backjumping, while all levels are known
+                cref, lbd = self._add_learned_clause(learned_clause)
+                stats.on_learned(len(learned_clause), lbd)
+                self.cla_inc *= 1.0 / self.cla_decay
+                if self.on_learned is not None:
+                    self.on_learned(learned_clause)
+                if self.restart_policy is not None:
+                    self.restart_policy.on_conflict(lbd)
                     
                 # Backtrack non-chronologically
                 self._backtrack(backtrack_level)
+                self._attach_clause(cref)
+                self._enqueue(learned_clause[0], cref)
+                
+                if stats.conflicts >= self.next_reduce:
+                    self._reduce_db()
+                    self.reduce_interval += self.reduce_increment
+                    self.next_reduce = stats.conflicts + self.reduce_interval
+                elif stats.conflicts >= self.next_capacity_check and self._over_capacity():
+                    # Off schedule: the LBD schedule is left alone
+                    if not self._reduce_db():
+                        self.next_capacity_check = stats.conflicts + self.capacity_backoff
+                if self.on_progress is not None and stats.conflicts % self.progress_interval == 0:
+                    self.on_progress(stats)
+                if self._out_of_budget():
+                    self._backtrack(0)
+                    return UNKNOWN, {}
                 continue
             
-            var = self._find_unassigned_var()
+            if self.restart_policy is not None and self.restart_policy.should_restart():
+                self._restart()
+                if not self.ok:
+                    self.log("Conflict at level 0 after restart - UNSAT")
+                    return False, {}
+                continue
             
-            if var is None:
-                if self._verify_solution():
-                    self.log("Solution found - SAT")
-                    return True, self.assignments.copy()
-                return False, {}
+            # Assumptions are decided first, one per level
+            decision = None
+            while self.level < len(assumptions):
+                lit = assumptions[self.level]
+                value = self.assignments[lit]
+                if value is None:
+                    decision = lit
+                    break
+                if value is False:
+                    self.core = self._analyze_final(-lit)
+                    if self.debug:
+                        self.log(f"Assumptions are contradictory - UNSAT, core {self.core}")
+                    self._backtrack(0)
+                    return False, {}
+                # Already implied: an empty level keeps levels and assumptions aligned
+                self.trail_lim.append(len(self.trail))
+                self.level += 1
             
-            # Make new decision using phase saving
+            if decision is None:
+                if self._out_of_budget():
+                    self._backtrack(0)
+                    return UNKNOWN, {}
+                var = self._find_unassigned_var()
+                
+                if var is None:
+                    if self._verify_solution():
+                        self.log("Solution found - SAT")
+                        if self.priority is not None:
+                            trail = self.trail
+                            self.model_decisions = [trail[self.trail_lim[i]]
+                                                    for i in range(len(assumptions), self.level)]
+                        model = self._model()
+                        if self.eliminated:
+                            extend_model(model, self.eliminated)
+                        self._backtrack(0)
+                        return True, model
+                    self._backtrack(0)
+                    return False, {}
+                
+                # Make new decision using phase saving
+                decision = var if self.saved_phases[var] else -var
+            
+            self.trail_lim.append(len(self.trail))
             self.level += 1
-            value = self.saved_phases.get(var, True)  
-            self.assignments[var] = value
-            self.decision_levels[var] = self.level
-            self.log(f"Decision: set {var} to {value} at level {self.level} (activity: {self.variable_activity[var]:.2f})")
+            self._enqueue(decision)
+            stats.decisions += 1
+            if self.debug:
+                self.log(f"Decision: set {abs(decision)} to {decision > 0} at level {self.level} (activity: {self.variable_activity[abs(decision)]:.2f})")
             
             self._decay_variables()
             
+    def propagate(self, assumptions):
+        """Unit-propagate `assumptions` on top of the level-0 facts.
+
+        Returns (True, implied) where implied lists every literal assigned
+        above level 0, the assumptions included, or (False, []) when they
+        lead to a conflict. The solver is left at level 0 either way.
+        """
+        top = max((abs(lit) for lit in assumptions), default=0)
+        if top > self.num_vars:
+            self._grow(top)
+        self._backtrack(0)
+        if self.eliminated:
+            self._restore_literals(assumptions)
+        if not self.ok:
+            return False, []
+        success, _ = self._unit_propagation()
+        if not success:
+            self.ok = False
+            return False, []
+            
+        start = len(self.trail)
+        for lit in assumptions:
+            value = self.assignments[lit]
+            if value is False:
+                self._backtrack(0)
+                return False, []
+            if value is None:
+                self.trail_lim.append(len(self.trail))
+                self.level += 1
+                self._enqueue(lit)
+                success, _ = self._unit_propagation()
+                if not success:
+                    self._backtrack(0)
+                    return False, []
+        implied = self.trail[start:]
+        self._backtrack(0)
+        return True, implied
+            
+    def iter_models(self, projection=None, assumptions=()):
+        """Yield the models of the clauses one at a time.
+
+        With a `projection` (variables), each yielded dict covers just
+        those variables and every distinct projected model comes once;
+        otherwise models are complete. No blocking clauses are added: the
+        projection variables are decided first, and after a model with
+        decisions d1..dk the rest of the space is split into the
+        subproblems d1..d(i-1), -di, solved in turn as assumptions. Learned
+        clauses carry over between models and the formula is unchanged
+        once the generator finishes. interrupt() ends the enumeration.
+        """
+        assumptions = list(assumptions)
+        top = max((abs(lit) for lit in assumptions), default=0)
+        if top > self.num_vars:
+            self._grow(top)
+        if projection is None:
+            projection = range(1, self.num_vars + 1)
+        projection = list(dict.fromkeys(abs(var) for var in projection))
+        top = max(projection, default=0)
+        if top > self.num_vars:
+            self._grow(top)
+        self._backtrack(0)
+        if self.eliminated:
+            self._restore_literals(projection)
+        projected = set(projection)
+
+        self.priority = projection
+        self.priority_heads = []
+        pending = [[]]
+        try:
+            while pending:
+                prefix = pending.pop()
+                is_sat, model = self.solve(assumptions + prefix)
+                if is_sat is UNKNOWN:
+                    return
+                if not is_sat:
+                    if not self.ok:
+                        return
+                    continue
+                decisions = [lit for lit in self.model_decisions if abs(lit) in projected]
+                for i in range(len(decisions)):
+                    pending.append(prefix + decisions[:i] + [-decisions[i]])
+                if projected.issuperset(model) and len(model) == len(projected):
+                    yield model
+                else:
+                    yield {var: model.get(var, False) for var in projection}
+        finally:
+            self.priority = None
+            self.priority_heads = []
+
+    def _analyze_final(self, lit):
+        """Return the assumptions that together force `lit` to be true.
+
+        The result holds the assumption -lit itself plus every assumption
+        decision reachable from `lit` through the implication graph.
+        """
+        core = [-lit]
+        if self.level == 0:
+            return core
+            
+        arena = self.arena
+        seen = self.seen
+        levels = self.decision_levels
+        implications = self.implications
+        trail = self.trail
+        seen[abs(lit)] = True
+        for i in range(len(trail) - 1, self.trail_lim[0] - 1, -1):
+            var = abs(trail[i])
+            if not seen[var]:
+                continue
+            cref = implications[var]
+            if cref is None:
+                # Only assumptions are decided below the search levels
+                core.append(trail[i])
+            else:
+                if cref >= 0:
+                    start = cref + HEADER_SIZE
+                    reason = arena[start:start + arena[cref]]
+                else:
+                    reason = self._native_reason(var, cref)
+                for other in reason:
+                    other_var = abs(other)
+                    if other_var != var and levels[other_var] > 0:
+                        seen[other_var] = True
+            seen[var] = False
+        return core
+            
+    def _restart(self):
+        # Saved phases and learned clauses survive the restart
+        if self.debug:
+            self.log(f"Restart after {self.stats.conflicts} conflicts")
+        self._backtrack(0)
+        self.restart_policy.on_restart()
+        self.stats.restarts += 1
+        if self.import_clauses is not None:
+            for clause in self.import_clauses():
+                clause = list(dict.fromkeys(clause))
+                if self.proof is not None:
+                    self.proof.add(clause)
+                self._add_clause(clause)
+        if self.inprocess and self.ok and self.stats.restarts % self.inprocess_interval == 0:
+            self._inprocess()
+        if self.has_xors and self.gauss_at_restarts and self.ok and len(self.trail) > self.gauss_trail:
+            self._gauss()
+        if self.rephase_flips and self.ok and self.stats.restarts >= self.next_rephase:
+            self.next_rephase *= 2
+            self._rephase()
+        if self.checkpoint_path is not None and \
+                time.perf_counter() - self.last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def checkpoint(self, path=None):
+        """Save the solver state to `path` (default: checkpoint_path).
+
+        checkpoint.load_checkpoint(path, **options) resumes from the file.
+        """
+        from checkpoint import save_checkpoint
+        save_checkpoint(self, path or self.checkpoint_path)
+        self.last_checkpoint = time.perf_counter()
+        self.log(f"Checkpoint written after {self.stats.conflicts} conflicts")
+
+    def _rephase(self):
+        """Seed the saved phases with the best assignment local search finds."""
+        # The search object (occurrence lists) is reused until clauses change
+        key = (id(self.clauses), len(self.clauses), self.num_vars)
+        if self.local_search_key != key:
+            self.local_search = LocalSearch(self.iter_clauses(), self.num_vars, seed=self.seed)
+            self.local_search_key = key
+        values = list(self.saved_phases)
+        assignments = self.assignments
+        for lit in self.trail:
+            values[abs(lit)] = assignments[abs(lit)]
+        satisfied, best = self.local_search.run(self.rephase_flips, values)
+        self.saved_phases[1:] = best[1:self.num_vars + 1]
+        self.stats.rephases += 1
+        if self.debug:
+            self.log(f"Local search rephase: {self.local_search.best_unsat} clauses left falsified")
+
+    def _gauss(self):
+        """Gauss-Jordan elimination over the XOR constraints at level 0.
+
+        Fixed variables are substituted first. Rows reduced to a single
+        variable become units. The reduced system replaces the XOR
+        constraints unless it is longer than the original, in which case
+        only its two-variable rows (equivalences) are added.
+        Returns False if the XOR constraints are inconsistent.
+        """
+        self.xors_changed = False
+        self.gauss_trail = len(self.trail)
+        assignments = self.assignments
+        constraints = self.constraints
+        cids = [cid for cid, constraint in enumerate(constraints) if isinstance(constraint, Xor)]
+        if not cids or len(cids) > self.gauss_limit:
+            return True
+        columns = {}
+        variables = []
+        rows = []
+        size = 0
+        for cid in cids:
+            xor = constraints[cid]
+            mask = 0
+            parity = xor.parity
+            for var in xor.vars:
+                value = assignments[var]
+                if value is None:
+                    column = columns.get(var)
+                    if column is None:
+                        column = columns[var] = len(variables)
+                        variables.append(var)
+                    mask ^= 1 << column
+                elif value:
+                    parity ^= 1
+            rows.append((mask, parity))
+            size += len(xor.vars)
+        reduced = gauss_jordan(rows)
+        if reduced is None:
+            self.log("Gaussian elimination: XOR constraints are inconsistent - UNSAT")
+            self.ok = False
+            return False
+
+        reduced_rows = []
+        for mask, parity in reduced:
+            row = []
+            while mask:
+                low = mask & -mask
+                row.append(variables[low.bit_length() - 1])
+                mask ^= low
+            reduced_rows.append((row, parity))
+        replace = sum(len(row) for row, _ in reduced_rows) <= size
+        if replace:
+            # Level-0 facts may have been implied by the replaced constraints
+            implications = self.implications
+            for lit in self.trail:
+                reason = implications[abs(lit)]
+                if reason is not None and reason < 0:
+                    implications[abs(lit)] = None
+            dead = set(cids)
+            for cid in cids:
+                constraints[cid] = None
+            self.free_cids.extend(reversed(cids))
+            for lit in range(1, self.num_vars + 1):
+                for watch_lit in (lit, -lit):
+                    watching = self.native_watches[watch_lit]
+                    if watching:
+                        watching[:] = [cid for cid in watching if cid not in dead]
+
+        units = 0
+        for row, parity in reduced_rows:
+            if len(row) == 1:
+                lit = row[0] if parity else -row[0]
+                if assignments[lit] is None:
+                    self._learn_unit(lit)
+                    units += 1
+            elif replace:
+                self._add_constraint(Xor(row, parity))
+            elif len(row) == 2:
+                key = (min(row), max(row), parity)
+                if key not in self.gauss_derived:
+                    self.gauss_derived.add(key)
+                    self._add_constraint(Xor(row, parity))
+        if self.debug:
+            self.log(f"Gaussian elimination: {len(cids)} XORs -> {len(reduced_rows)} rows, {units} units")
+        return self.ok
+
+    def _inprocess(self):
+        """Run failed-literal probing, then vivification, at level 0."""
+        now = time.perf_counter()
+        deadline = now + self.inprocess_time_share * (now - self.last_inprocess)
+        success, _ = self._unit_propagation()
+        if not success:
+            self.ok = False
+        elif self._probe(deadline):
+            self._vivify(deadline)
+        self.last_inprocess = time.perf_counter()
+
+    def _probe_literal(self, lit):
+        """Propagate `lit` on a fresh level and undo it again.
+
+        Returns (implied literals or None on a conflict, propagations).
+        Saved phases are left as they were.
+        """
+        trail = self.trail
+        start = len(trail)
+        self.trail_lim.append(start)
+        self.level += 1
+        self._enqueue(lit)
+        success, _ = self._unit_propagation()
+        implied = set(trail[start + 1:]) if success else None
+        return implied, self._undo_probe(start)
+
+    def _undo_probe(self, start):
+        saved_phases = self.saved_phases
+        trail = self.trail
+        phases = [(abs(lit), saved_phases[abs(lit)]) for lit in trail[start:]]
+        count = len(trail) - start
+        self._backtrack(0)
+        for var, phase in phases:
+            saved_phases[var] = phase
+        return count
+
+    def _learn_unit(self, lit):
+        # Level-0 fact found by inprocessing, stored like a learned clause
+        if self.proof is not None:
+            self.proof.add([lit])
+        cref, _ = self._add_learned_clause([lit])
+        self._enqueue(lit, cref)
+        if self.on_learned is not None:
+            self.on_learned([lit])
+
+    def _probe(self, deadline):
+        """Failed-literal probing on the most active variables.
+
+        A literal whose propagation conflicts is fixed the other way, and
+        literals implied by both phases of a variable are fixed outright.
+        Returns False if the clauses turn out UNSAT.
+        """
+        assignments = self.assignments
+        eliminated = self.eliminated
+        pool = (var for var in self.order_heap.heap
+                if assignments[var] is None and var not in eliminated)
+        candidates = heapq.nlargest(self.probe_limit, pool, key=self.variable_activity.__getitem__)
+        budget = self.probe_budget
+        found = 0
+        for var in candidates:
+            if budget <= 0 or time.perf_counter() > deadline:
+                break
+            if assignments[var] is not None:
+                continue
+            positive, count = self._probe_literal(var)
+            budget -= count
+            both = False
+            if positive is None:
+                units = [-var]
+            else:
+                negative, count = self._probe_literal(-var)
+                budget -= count
+                both = negative is not None
+                units = positive & negative if both else [var]
+            for lit in units:
+                if assignments[lit] is None:
+                    if both and self.proof is not None:
+                        # Implied by both phases: the two binaries make
+                        # the unit RUP
+                        self.proof.add([-var, lit])
+                        self.proof.add([var, lit])
+                    self._learn_unit(lit)
+                    found += 1
+                    if both and self.proof is not None:
+                        self.proof.delete([-var, lit])
+                        self.proof.delete([var, lit])
+            if units and not self._unit_propagation()[0]:
+                self.ok = False
+                return False
+        if found:
+            self.log(f"Probing fixed {found} literals")
+        return True
+
+    def _vivify(self, deadline):
+        """Shorten learned clauses by propagating their negated literals.
+
+        Literals are falsified one at a time; a literal that is already
+        false can be dropped, and once a literal of the clause becomes true
+        or propagation conflicts, the literals processed so far suffice.
+        Each clause is tried once, lowest LBD first.
+        """
+        arena = self.arena
+        assignments = self.assignments
+        activity = self.clause_activity
+        candidates = [cref for cref in self.learned_clauses
+                      if arena[cref] > 2 and not arena[cref + 1] & VIVIFIED and not self._is_locked(cref)]
+        candidates.sort(key=lambda c: arena[c + 2])
+        budget = self.vivify_budget
+        removed = []
+        for cref in candidates:
+            if budget <= 0 or time.perf_counter() > deadline:
+                break
+            arena[cref + 1] |= VIVIFIED
+            clause = self._clause_literals(cref).tolist()
+            if any(assignments[lit] is True for lit in clause):
+                # Satisfied at level 0
+                removed.append(cref)
+                continue
+
+            start = len(self.trail)
+            kept = []
+            for lit in clause:
+                value = assignments[lit]
+                if value is False:
+                    continue
+                kept.append(lit)
+                if value is True:
+                    break
+                self.trail_lim.append(len(self.trail))
+                self.level += 1
+                self._enqueue(-lit)
+                if not self._unit_propagation()[0]:
+                    break
+            budget -= self._undo_probe(start)
+            if len(kept) == len(clause):
+                continue
+
+            removed.append(cref)
+            if len(kept) == 1:
+                if assignments[kept[0]] is None:
+                    self._learn_unit(kept[0])
+                    if not self._unit_propagation()[0]:
+                        self.ok = False
+                        break
+                continue
+            if self.proof is not None:
+                self.proof.add(kept)
+            new_cref, _ = self._add_learned_clause(kept)
+            arena[new_cref + 1] |= VIVIFIED
+            arena[new_cref + 2] = min(arena[cref + 2], len(kept))
+            activity[new_cref] = activity[cref]
+            self._attach_clause(new_cref)
+            if self.on_learned is not None:
+                self.on_learned(kept)
+
+        if removed:
+            removed_set = set(removed)
+            self.learned_clauses = [c for c in self.learned_clauses if c not in removed_set]
+            self.learned_bytes -= sum(self._clause_bytes(c) for c in removed)
+            if self.proof is not None:
+                for cref in removed:
+                    self.proof.delete(self._clause_literals(cref))
+            self._remove_clauses(removed)
+            self.log(f"Vivification shortened or removed {len(removed)} learned clauses")
+            
+    def _model(self):
+        assignments = self.assignments
+        return {var: assignments[var] for var in range(1, self.num_vars + 1)
+                if assignments[var] is not None}
+            
     def _verify_solution(self):
-        for clause in self.clauses + self.learned_clauses:
+        # Learned clauses are implied by the originals, so they are skipped
+        arena = self.arena
+        assignments = self.assignments
+        for cref in self.clauses:
             satisfied = False
-            for lit in clause:
-                var = abs(lit)
-                if var in self.assignments and (lit > 0) == self.assignments[var]:
+            start = cref + HEADER_SIZE
+            for lit in arena[start:start + arena[cref]]:
+                if assignments[lit] is True:
                     satisfied = True
                     break
             if not satisfied:
                 return False
+        for constraint in self.constraints:
+            if constraint is not None and not constraint.satisfied(assignments):
+                return False
         return True
+
+
+def main(argv=None):
+    """Command-line entry point with SAT-competition output and exit codes."""
+    import argparse
+    from dimacs import load_dimacs
+
+    parser = argparse.ArgumentParser(prog="python -m sat_solver",
+                                     description="Solve a DIMACS CNF formula (plain, .gz, .bz2 or .xz).")
+    parser.add_argument("path", help="CNF file")
+    parser.add_argument("--restart", choices=sorted(RESTART_POLICIES) + ["none"], default="glucose",
+                        help="restart policy (default: glucose)")
+    parser.add_argument("--no-preprocess", action="store_true",
+                        help="skip subsumption and variable elimination before the search")
+    parser.add_argument("--no-model", action="store_true", help="do not print the v lines")
+    parser.add_argument("--debug", action="store_true", help="print solver debug output")
+    parser.add_argument("--stats", metavar="PATH", help="write a JSON statistics summary to PATH")
+    parser.add_argument("--profile", action="store_true", help="time the search phases (see --stats)")
+    parser.add_argument("--progress", type=int, metavar="N", help="print a progress line every N conflicts")
+    parser.add_argument("--time-limit", type=float, metavar="SECONDS", help="give up (s UNKNOWN) after SECONDS")
+    parser.add_argument("--conflict-limit", type=int, metavar="N", help="give up (s UNKNOWN) after N conflicts")
+    parser.add_argument("--memory-limit", type=float, metavar="MB", help="give up (s UNKNOWN) above MB of memory")
+    parser.add_argument("--proof", metavar="PATH", help="write a binary DRAT proof of UNSAT to PATH")
+    parser.add_argument("--text-proof", action="store_true", help="write the DRAT proof as text")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="save the solver state to PATH periodically, on SIGTERM and when a limit runs out")
+    parser.add_argument("--checkpoint-interval", type=float, default=600.0, metavar="SECONDS",
+                        help="seconds between checkpoints (default 600)")
+    parser.add_argument("--resume", action="store_true",
+                        help="resume from the --checkpoint file, if it exists, instead of reading the CNF")
+    args = parser.parse_args(argv)
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+    if args.checkpoint and args.proof:
+        parser.error("--checkpoint cannot be combined with --proof")
+
+    proof = DratWriter(args.proof, binary=not args.text_proof) if args.proof else None
+    options = dict(debug=args.debug, profile=args.profile, proof=proof,
+                   restart_policy=None if args.restart == "none" else args.restart)
+    out = sys.stdout
+    if args.resume and os.path.exists(args.checkpoint):
+        from checkpoint import load_checkpoint
+        solver = load_checkpoint(args.checkpoint, **options)
+        num_vars = solver.checkpoint_info.get("num_vars", solver.num_vars)
+        out.write(f"c resumed after {solver.conflicts} conflicts, {len(solver.learned_clauses)} learned clauses\n")
+    else:
+        solver = CDCLSolver(**options)
+        num_vars = load_dimacs(solver, args.path).num_vars
+        out.write(f"c {solver.num_vars} variables, {len(solver.clauses)} clauses\n")
+        if not args.no_preprocess:
+            solver.simplify()
+            out.write(f"c preprocessed: {len(solver.eliminated)} variables eliminated, "
+                      f"{len(solver.clauses)} clauses left\n")
+    if args.checkpoint:
+        import signal
+        solver.checkpoint_info["num_vars"] = num_vars
+        solver.checkpoint_path = args.checkpoint
+        solver.checkpoint_interval = args.checkpoint_interval
+        # A preempted run stops at the next conflict or decision and saves
+        signal.signal(signal.SIGTERM, lambda signum, frame: solver.interrupt())
+
+    if args.progress:
+        def progress(stats):
+            out.write(f"c {stats.conflicts} conflicts, {stats.decisions} decisions, "
+                      f"{stats.propagations} propagations, {len(solver.learned_clauses)} learned\n")
+            out.flush()
+        solver.on_progress = progress
+        solver.progress_interval = args.progress
+
+    memory_limit = None if args.memory_limit is None else int(args.memory_limit * 1024 * 1024)
+    try:
+        is_sat, assignment = solver.solve(conflict_budget=args.conflict_limit, time_budget=args.time_limit,
+                                          memory_budget=memory_limit)
+    except KeyboardInterrupt:
+        # The state may be mid-update, so no checkpoint is taken from it
+        is_sat, assignment = UNKNOWN, {}
+        args.checkpoint = None
+    if proof is not None:
+        proof.close()
+    if is_sat is UNKNOWN and args.checkpoint:
+        solver.checkpoint()
+        out.write(f"c checkpoint written to {args.checkpoint}\n")
+    out.write(f"c {solver.conflicts} conflicts, {solver.restarts} restarts\n")
+    if args.stats:
+        with open(args.stats, "w") as f:
+            f.write(solver.stats.to_json(indent=2))
+    if is_sat is UNKNOWN:
+        out.write("s UNKNOWN\n")
+        return 0
+    if not is_sat:
+        out.write("s UNSATISFIABLE\n")
+        return 20
+
+    out.write("s SATISFIABLE\n")
+    if not args.no_model:
+        num_vars = max(num_vars, solver.num_vars)
+        literals = [str(var if assignment.get(var, True) else -var) for var in range(1, num_vars + 1)]
+        literals.append("0")
+        # Keeping v lines at a readable width
+        lines = []
+        for i in range(0, len(literals), 20):
+            lines.append("v " + " ".join(literals[i:i + 20]) + "\n")
+        out.writelines(lines)
+    return 10
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Stochastic local search (ProbSAT and WalkSAT).
+
+LocalSearch keeps, for the current assignment, the number of true literals
+of every clause, the XOR of the true variables of every clause (which is
+the one true variable whenever there is only one), the break count of
+every variable and the list of falsified clauses. A flip only touches the
+clauses in the occurrence lists of the flipped variable, so a step costs
+time proportional to its occurrences rather than to the formula.
+
+It can be used on its own (solve_sls) or by CDCLSolver to rephase: the
+best assignment found seeds the saved phases of the CDCL search.
+"""
+
+import random
+from array import array
+
+ALGORITHMS = ("probsat", "walksat")
+
+
+class LocalSearch:
+    """Local search over a fixed clause set.
+
+    ProbSAT picks a variable of a random falsified clause with probability
+    proportional to (eps + break)^-cb; WalkSAT takes a variable that breaks
+    nothing if there is one, otherwise a random one with probability
+    `noise` and a least-breaking one else.
+    """
+
+    def __init__(self, clauses, num_vars=None, algorithm="probsat", cb=2.06, eps=0.9,
+                 noise=0.567, seed=None):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown local search algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.noise = noise
+        self.rng = random.Random(seed)
+
+        # Clause i has literals[starts[i]:starts[i + 1]]
+        self.literals = array("i")
+        self.starts = array("i", [0])
+        top = num_vars or 0
+        for clause in clauses:
+            if not clause:
+                raise ValueError("Local search needs a formula without empty clauses")
+            clause = list(dict.fromkeys(clause))
+            if any(-lit in clause for lit in clause):
+                # Tautologies constrain nothing
+                continue
+            self.literals.extend(clause)
+            self.starts.append(len(self.literals))
+            top = max(top, max(map(abs, clause)))
+        self.num_vars = top
+        self.num_clauses = len(self.starts) - 1
+
+        # Literal-indexed occurrence lists (negative literals from the end)
+        self.occurs = [[] for _ in range(2 * top + 1)]
+        literals = self.literals
+        starts = self.starts
+        for i in range(self.num_clauses):
+            for k in range(starts[i], starts[i + 1]):
+                self.occurs[literals[k]].append(i)
+
+        # Selection weights by break count, ProbSAT's polynomial break function
+        self.weights = [(eps + b) ** -cb for b in range(64)]
+
+        self.values = [False] * (top + 1)
+        self.true_count = [0] * self.num_clauses
+        self.true_xor = [0] * self.num_clauses
+        self.breaks = [0] * (top + 1)
+        self.unsat = []
+        self.unsat_index = [-1] * self.num_clauses
+        self.flips = 0
+
+    def reset(self, values):
+        """Start from `values` (a list indexed by variable) and rebuild counts."""
+        self.values = values = list(values[:self.num_vars + 1])
+        values.extend(self.rng.random() < 0.5 for _ in range(self.num_vars + 1 - len(values)))
+        literals = self.literals
+        starts = self.starts
+        true_count = self.true_count
+        true_xor = self.true_xor
+        breaks = self.breaks = [0] * (self.num_vars + 1)
+        self.unsat = unsat = []
+        unsat_index = self.unsat_index
+        for i in range(self.num_clauses):
+            count = 0
+            xor = 0
+            for k in range(starts[i], starts[i + 1]):
+                lit = literals[k]
+                if values[abs(lit)] == (lit > 0):
+                    count += 1
+                    xor ^= abs(lit)
+            true_count[i] = count
+            true_xor[i] = xor
+            if count == 0:
+                unsat_index[i] = len(unsat)
+                unsat.append(i)
+            else:
+                unsat_index[i] = -1
+                if count == 1:
+                    breaks[xor] += 1
+
+    def flip(self, var):
+        values = self.values
+        true_count = self.true_count
+        true_xor = self.true_xor
+        breaks = self.breaks
+        unsat = self.unsat
+        unsat_index = self.unsat_index
+        value = not values[var]
+        values[var] = value
+        made_true = var if value else -var
+        self.flips += 1
+
+        for i in self.occurs[made_true]:
+            count = true_count[i] + 1
+            true_count[i] = count
+            if count == 1:
+                # Satisfied now: swap-remove from the falsified list
+                last = unsat.pop()
+                position = unsat_index[i]
+                if last != i:
+                    unsat[position] = last
+                    unsat_index[last] = position
+                unsat_index[i] = -1
+                breaks[var] += 1
+            elif count == 2:
+                breaks[true_xor[i]] -= 1
+            true_xor[i] ^= var
+
+        for i in self.occurs[-made_true]:
+            count = true_count[i] - 1
+            true_count[i] = count
+            xor = true_xor[i] ^ var
+            true_xor[i] = xor
+            if count == 0:
+                unsat_index[i] = len(unsat)
+                unsat.append(i)
+                breaks[var] -= 1
+            elif count == 1:
+                breaks[xor] += 1
+
+    def _pick(self, clause):
+        literals = self.literals
+        breaks = self.breaks
+        candidates = [abs(literals[k]) for k in range(self.starts[clause], self.starts[clause + 1])]
+        if self.algorithm == "probsat":
+            weights = self.weights
+            top = len(weights) - 1
+            scores = [weights[min(breaks[var], top)] for var in candidates]
+            return self.rng.choices(candidates, scores)[0]
+
+        best = min(breaks[var] for var in candidates)
+        if best > 0 and self.rng.random() < self.noise:
+            return self.rng.choice(candidates)
+        return self.rng.choice([var for var in candidates if breaks[var] == best])
+
+    def run(self, max_flips, values=None):
+        """Search for at most `max_flips` flips.
+
+        Starts from `values` if given, otherwise from a random assignment.
+        Returns (satisfied, best) where best is the assignment with the
+        fewest falsified clauses seen, as a list indexed by variable.
+        """
+        if values is None:
+            values = [False] + [self.rng.random() < 0.5 for _ in range(self.num_vars)]
+        self.reset(values)
+        unsat = self.unsat
+        current = self.values
+        best = list(current)
+        best_unsat = len(unsat)
+        # Variables flipped since `best` was last brought up to date
+        changed = []
+        rng = self.rng
+        for _ in range(max_flips):
+            if not unsat:
+                break
+            var = self._pick(unsat[rng.randrange(len(unsat))])
+            self.flip(var)
+            changed.append(var)
+            if len(unsat) < best_unsat:
+                best_unsat = len(unsat)
+                for var in changed:
+                    best[var] = current[var]
+                changed.clear()
+        self.best_unsat = best_unsat
+        return best_unsat == 0, best
+
+
+def solve_sls(clauses, max_flips=1_000_000, algorithm="probsat", seed=None, restarts=1):
+    """Standalone local search.
+
+    Returns (True, model) like CDCLSolver.solve when a model is found, or
+    (None, best assignment) when the flip budget runs out; local search
+    cannot prove unsatisfiability.
+    """
+    search = LocalSearch(clauses, algorithm=algorithm, seed=seed)
+    best = None
+    for _ in range(restarts):
+        satisfied, values = search.run(max_flips // restarts)
+        model = {var: values[var] for var in range(1, search.num_vars + 1)}
+        if satisfied:
+            return True, model
+        if best is None or search.best_unsat < best[0]:
+            best = (search.best_unsat, model)
+    return None, best[1]
@@ -0,0 +1,13 @@
+from sat_solver import CDCLSolver
+
+
+def test_gauss_reuses_constraint_slots():
+    solver = CDCLSolver()
+    solver.add_xor([1, 2, 3], 1)
+    solver.add_xor([1, 2, 4], 0)
+    for _ in range(10):
+        solver._gauss()
+    assert len(solver.constraints) == 2
+    is_sat, model = solver.solve()
+    assert is_sat is True
+    assert model[1] ^ model[2] ^ model[3] and not model[1] ^ model[2] ^ model[4]
@@ -0,0 +1,32 @@
+import random
+
+from benchmarks.generators import random_ksat
+from maxsat import MaxSATSolver
+
+
+def test_optimum():
+    hard = [[1, 2, 3]]
+    soft = [(1, [-1]), (1, [-2]), (3, [-3])]
+    maxsat = MaxSATSolver(hard, soft)
+    is_sat, model = maxsat.solve()
+    assert is_sat is True and maxsat.optimal
+    assert maxsat.best_cost == maxsat.cost(model) == 1
+
+
+def test_unsatisfiable_hard_clauses():
+    # Unsatisfiability here is only found while trimming a core
+    hard = random_ksat(30, ratio=6.0, seed=27)
+    rng = random.Random(0)
+    soft = [(rng.randint(1, 5), [rng.choice([-1, 1]) * rng.randint(1, 30) for _ in range(rng.randint(1, 3))])
+            for _ in range(20)]
+    for stratify in (False, True):
+        assert MaxSATSolver(hard, soft, 30, stratify=stratify).solve() == (False, {})
+
+
+def test_add_soft_after_solve():
+    maxsat = MaxSATSolver([[1, 2, 3]], [(1, [-1]), (1, [-2]), (3, [-3])])
+    maxsat.solve()
+    maxsat.add_soft([3], 10)
+    is_sat, model = maxsat.solve()
+    assert is_sat is True and maxsat.optimal
+    assert maxsat.best_cost == maxsat.cost(model) == 3
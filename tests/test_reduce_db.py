@@ -0,0 +1,25 @@
+from sat_solver import CDCLSolver
+
+
+def _solver_with_glue_clauses(count, **options):
+    solver = CDCLSolver(**options)
+    solver.add_clause([1, 2, 3, 4, 5, 6])
+    for i in range(count):
+        clause = [1 + i % 6, -(1 + (i + 1) % 6), 1 + (i + 2) % 6]
+        cref, _ = solver._add_learned_clause(clause)
+        solver._attach_clause(cref)
+    return solver
+
+
+def test_max_learned_keeps_exactly_the_ceiling():
+    solver = _solver_with_glue_clauses(30, max_learned=10)
+    assert solver._over_capacity()
+    solver._reduce_db()
+    assert len(solver.learned_clauses) == 10
+
+
+def test_max_learned_bytes_is_honoured():
+    solver = _solver_with_glue_clauses(30, max_learned_bytes=10 * 4 * 6)
+    solver._reduce_db()
+    assert solver.learned_bytes <= 10 * 4 * 6
+    assert len(solver.learned_clauses) == 10